@@ -1,3 +1,10 @@
 LLM_MODEL_NAME = "gpt-35-turbo"
 EMBEDDINGS_MODEL_NAME = "text-embedding-ada-002"
 TABLE_NAME = "TERRAFORM_DOCS"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+# Answer near-duplicate questions from a cache instead of the LLM
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.95  # Minimum cosine similarity between the questions
+SEMANTIC_CACHE_MAX_ENTRIES = 256
+SEMANTIC_CACHE_TTL_SECONDS = 3600
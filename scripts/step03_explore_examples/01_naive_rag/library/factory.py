@@ -3,6 +3,7 @@ from gen_ai_hub.proxy.langchain.openai import OpenAIEmbeddings
 from gen_ai_hub.proxy.core.proxy_clients import get_proxy_client
 from .config import LLM_MODEL_NAME, EMBEDDINGS_MODEL_NAME
 from langchain_core.rate_limiters import InMemoryRateLimiter
+from utils.embeddings import CachedEmbeddings, ConcurrentEmbeddings
 
 
 def create_llm_and_embeddings():
@@ -27,4 +28,10 @@ def create_llm_and_embeddings():
         proxy_client=proxy_client,
         show_progress_bar=True,
     )
+    # Serve already embedded chunks from the local embedding cache and send the
+    # others in concurrent, throttled requests
+    embeddings = CachedEmbeddings(
+        ConcurrentEmbeddings(embeddings, model_name=EMBEDDINGS_MODEL_NAME),
+        model_name=EMBEDDINGS_MODEL_NAME,
+    )
     return llm, embeddings
@@ -1,61 +1,86 @@
 from logging import getLogger
 
 from langchain_community.vectorstores.hanavector import HanaDB
-from langchain_community.document_loaders import GitLoader
 
-from utils.rag import split_docs_into_chunks
+from utils.pipeline import stream_documents
+from utils.manifest import RESUME_HINT
+from utils.embeddings import log_embedding_cache_stats, log_embedding_request_stats
+from utils.git_loader import (
+    ShallowGitLoader,
+    ingestion_fingerprint,
+    record_ingested_commit,
+)
 from utils.hana import (
-    get_connection_to_hana_db,
-    teardown_hana_table,
+    hana_connection,
     has_embeddings,
+    log_hana_pool_stats,
+    table_has_rows,
 )
 
-from .config import TABLE_NAME
+from .config import TABLE_NAME, EMBEDDINGS_MODEL_NAME, CHUNK_SIZE, CHUNK_OVERLAP
 from .factory import create_llm_and_embeddings
 
 log = getLogger(__name__)
 
+DOCS_REPO_PATH = "./gen/docs/"
+# Changing the chunking or the embedding model triggers a new ingestion of the same commit
+INGESTION_FINGERPRINT = ingestion_fingerprint(
+    EMBEDDINGS_MODEL_NAME, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+)
+
 
 def fetch_docs():
     try:
         log.info("Getting the documents from the GitHub repository")
-        loader = GitLoader(
+        loader = ShallowGitLoader(
             clone_url="https://github.com/SAP/terraform-provider-btp",
-            repo_path="./gen/docs/",
+            repo_path=DOCS_REPO_PATH,
+            sparse_paths=["docs"],
             file_filter=lambda file_path: file_path.startswith("./gen/docs/docs")
             and file_path.endswith(".md"),
             branch="main",
         )
-        documents = loader.load()
-        log.success("Documents loaded successfully.")
-        return documents
+        if loader.is_ingested(TABLE_NAME, INGESTION_FINGERPRINT) and table_has_rows(TABLE_NAME):
+            log.success(
+                f"Commit {loader.commit_sha[:8]} is already ingested into {TABLE_NAME}, nothing to do."
+            )
+            return None
+        log.success("Repository synced, the documents are read while they are ingested.")
+        return loader.lazy_load()
     except Exception as e:
         log.error(f"Error occurred while loading documents: {str(e)}")
+        raise
 
 
 def ingest(documents):
+    if documents is None:
+        return
+
     try:
         log.info(f"Start ingesting data in {TABLE_NAME}")
 
-        teardown_hana_table(TABLE_NAME)
-        connection_to_hana = get_connection_to_hana_db()
         _, embeddings = create_llm_and_embeddings()
-        cur = connection_to_hana.cursor()
-        chunks = split_docs_into_chunks(documents=documents)
 
-        db = HanaDB(
-            embedding=embeddings, connection=connection_to_hana, table_name=TABLE_NAME
-        )
-        log.success("Clear the HANA DB")
-        db.delete(filter={})
-
-        log.info("Add documents chunks to the HANA DB")
-        db.add_documents(chunks)
-        log.success("Documents added successfully.")
+        with hana_connection() as connection_to_hana:
+            db = HanaDB(
+                embedding=embeddings, connection=connection_to_hana, table_name=TABLE_NAME
+            )
+            # Split, embed and write the documents while they are read from the repository
+            log.info("Synchronize document chunks with the HANA DB")
+            stream_documents(
+                db,
+                documents,
+                EMBEDDINGS_MODEL_NAME,
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+            )
+            log.success("Documents synchronized successfully.")
+        record_ingested_commit(TABLE_NAME, DOCS_REPO_PATH, INGESTION_FINGERPRINT)
 
         has_embeddings(TABLE_NAME, verbose=True)
         log.success("Ingestion completed successfully.")
-
-        cur.close()
+        log_embedding_cache_stats(embeddings)
+        log_embedding_request_stats(embeddings)
+        log_hana_pool_stats()
     except Exception as e:
-        log.error(f"Error occurred during ingestion: {str(e)}")
+        log.error(f"Error occurred during ingestion: {str(e)}. {RESUME_HINT}")
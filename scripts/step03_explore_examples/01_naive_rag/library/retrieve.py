@@ -6,16 +6,46 @@ from langchain.prompts import PromptTemplate
 from langchain.memory import ConversationBufferMemory
 
 from utils.hana import get_connection_to_hana_db
+from utils.embeddings import QueryCachedEmbeddings
+from utils.manifest import get_table_version
+from utils.semantic_cache import SemanticAnswerCache, SemanticCachedChain
 
 from .factory import create_llm_and_embeddings
-from .config import TABLE_NAME
+from .config import (
+    TABLE_NAME,
+    EMBEDDINGS_MODEL_NAME,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_TTL_SECONDS,
+)
 
 log = logging.getLogger(__name__)
 
+# Shared by all chat sessions of the process
+semantic_cache = None
+
+
+def get_semantic_cache(embeddings, connection_to_hana):
+    global semantic_cache
+    if semantic_cache is None:
+        semantic_cache = SemanticAnswerCache(
+            embeddings,
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+        )
+    # Invalidate the cached answers once the table is re-ingested
+    semantic_cache.embeddings = embeddings
+    semantic_cache.set_version(lambda: get_table_version(connection_to_hana, TABLE_NAME))
+    return semantic_cache
+
 
 def create_retriever():
     connection_to_hana = get_connection_to_hana_db()
     llm, embeddings = create_llm_and_embeddings()
+    # Repeated questions are not embedded again
+    embeddings = QueryCachedEmbeddings(embeddings, model_name=EMBEDDINGS_MODEL_NAME)
 
     db = HanaDB(
         embedding=embeddings, connection=connection_to_hana, table_name=TABLE_NAME
@@ -50,12 +80,18 @@ def create_retriever():
 
     chain_type_kwargs = {"prompt": PROMPT}
 
-    # Create a conversational retrieval chain
-    return ConversationalRetrievalChain.from_llm(
-        llm,
+    # Create a conversational retrieval chain. The answer is streamed, the standalone
+    # question generated from the chat history is not.
+    chain = ConversationalRetrievalChain.from_llm(
+        llm.model_copy(update={"streaming": True}),
         retriever,
+        condense_question_llm=llm,
         return_source_documents=True,
         memory=memory,
         verbose=False,
         combine_docs_chain_kwargs=chain_type_kwargs,
     )
+
+    if not SEMANTIC_CACHE_ENABLED:
+        return chain
+    return SemanticCachedChain(chain, get_semantic_cache(embeddings, connection_to_hana))
@@ -3,6 +3,9 @@ import sys
 
 from utils.env import init_env
 from utils.hana import teardown_hana_table
+from utils.embeddings import log_query_cache_stats
+from utils.semantic_cache import SemanticCachedChain, log_semantic_cache_stats
+from utils.streaming import TokenPrinter
 
 from library import (
     ingest,
@@ -16,6 +19,7 @@ log = logging.getLogger(__name__)
 
 def chat():
     qa_chain = create_retriever()
+    token_printer = TokenPrinter()
     while True:
         question = input("Ask a question or type 'exit' to leave: ")
 
@@ -23,6 +27,9 @@ def chat():
         question = question.strip()
 
         if question.lower() == "exit":
+            log_query_cache_stats()
+            if isinstance(qa_chain, SemanticCachedChain):
+                log_semantic_cache_stats(qa_chain.cache)
             break
 
         elif not question:
@@ -35,12 +42,17 @@ def chat():
             log.info(
                 "Embedding the questions and executing vector similarity search..."
             )
-            # Invoke the conversational retrieval chain with the user's question
-            result = qa_chain.invoke({"question": question})
-
-            # Output the answer from LLM
+            # Invoke the conversational retrieval chain with the user's question,
+            # the answer from LLM is printed while it is generated
             log.success("Answer from LLM:")
-            print(result["answer"])
+            token_printer.start()
+            result = qa_chain.invoke(
+                {"question": question}, config={"callbacks": [token_printer]}
+            )
+            if result.get("cached"):
+                print(result["answer"])
+                log.info("The answer was served from the semantic cache.")
+            token_printer.finish()
 
             # Output the source document chunks used for the answer
             source_docs = result["source_documents"]
@@ -76,8 +88,8 @@ def main():
             teardown_hana_table(TABLE_NAME)
             continue
         elif option == "1":
-            docs = fetch_docs()
             try:
+                docs = fetch_docs()
                 ingest(docs)
             except Exception as e:
                 log.error(f"Error occurred while ingesting data: {str(e)}")
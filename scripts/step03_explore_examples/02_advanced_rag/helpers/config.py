@@ -1,5 +1,14 @@
 LLM_MODEL_NAME = "gpt-35-turbo"
 EMBEDDINGS_MODEL_NAME = "text-embedding-ada-002"
+# "hana" for SAP HANA Cloud or "local" for the in-process vector store (no database required)
+VECTOR_STORE_BACKEND = "hana"
 PODCASTS_TABLE_NAME = "PODCASTS"
 TERRAFORM_TABLE_NAME = "TERRAFORM"
 SAP_DOCS_TABLE_NAME = "SAPDOCS"
+# Merge SAP docs chunks with at least this estimated Jaccard similarity before embedding
+# them, None to keep all chunks
+DEDUP_THRESHOLD = 0.9
+# Podcast episodes to ingest (url, title and episode number), relative to this example
+PODCAST_EPISODES_FILE = "data/podcast_episodes.json"
+# Number of podcast transcripts downloaded and parsed at the same time
+PODCAST_DOWNLOAD_WORKERS = 8
@@ -8,8 +8,10 @@ from gen_ai_hub.proxy.langchain.openai import OpenAIEmbeddings
 from gen_ai_hub.proxy.core.proxy_clients import get_proxy_client
 
 from utils.hana import get_connection_to_hana_db
+from utils.embeddings import CachedEmbeddings, ConcurrentEmbeddings
+from utils.local_vectorstore import get_local_vector_store
 
-from .config import LLM_MODEL_NAME, EMBEDDINGS_MODEL_NAME
+from .config import LLM_MODEL_NAME, EMBEDDINGS_MODEL_NAME, VECTOR_STORE_BACKEND
 
 log = logging.getLogger(__name__)
 
@@ -23,8 +25,6 @@ def setup_components(table_name, model_name=None, embeddings_model_name=None):
         assert model_name, "LLM_MODEL_NAME is required"
         assert embeddings_model_name, "EMBEDDINGS_MODEL_NAME is required"
 
-        connection = get_connection_to_hana_db()
-
         # Get the proxy client for the AI Core service
         proxy_client = get_proxy_client("gen-ai-hub")
 
@@ -35,9 +35,18 @@ def setup_components(table_name, model_name=None, embeddings_model_name=None):
         embeddings = OpenAIEmbeddings(
             proxy_model_name=EMBEDDINGS_MODEL_NAME, proxy_client=proxy_client
         )
+        # Serve already embedded chunks from the local embedding cache and send the
+        # others in concurrent, throttled requests
+        embeddings = CachedEmbeddings(
+            ConcurrentEmbeddings(embeddings, model_name=EMBEDDINGS_MODEL_NAME),
+            model_name=EMBEDDINGS_MODEL_NAME,
+        )
 
-
-        db = HanaDB(embedding=embeddings, connection=connection, table_name=table_name)
+        if VECTOR_STORE_BACKEND == "local":
+            db = get_local_vector_store(table_name, embeddings)
+        else:
+            connection = get_connection_to_hana_db()
+            db = HanaDB(embedding=embeddings, connection=connection, table_name=table_name)
 
         return llm, embeddings, db
     except Exception as e:
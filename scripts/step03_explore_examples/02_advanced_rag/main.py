@@ -2,11 +2,13 @@ import logging
 import sys
 
 from utils.env import init_env
-from utils.hana import teardown_hana_table as execute_teardown_hana_table
+from utils.hana import teardown_hana_table
+from utils.local_vectorstore import drop_local_vector_store
 
 from helpers.config import (
     SAP_DOCS_TABLE_NAME,
     PODCASTS_TABLE_NAME,
+    VECTOR_STORE_BACKEND,
 )
 
 from src import (
@@ -21,6 +23,13 @@ from src import (
 log = logging.getLogger(__name__)
 
 
+def execute_teardown_table(table_name):
+    if VECTOR_STORE_BACKEND == "local":
+        drop_local_vector_store(table_name)
+    else:
+        teardown_hana_table(table_name)
+
+
 def main():
     # Load environment variables
     init_env()
@@ -43,8 +52,8 @@ def main():
         option = input("Which task would you like to run?").strip()
 
         if option == "0":
-            execute_teardown_hana_table(SAP_DOCS_TABLE_NAME)
-            execute_teardown_hana_table(PODCASTS_TABLE_NAME)
+            execute_teardown_table(SAP_DOCS_TABLE_NAME)
+            execute_teardown_table(PODCASTS_TABLE_NAME)
             continue
         elif option == "1":
             execute_ingestion()
@@ -12,6 +12,8 @@ from langchain.prompts.chat import (
 from langchain.retrievers.self_query.base import SelfQueryRetriever
 from langchain_community.query_constructors.hanavector import HanaTranslator
 from utils.env import init_env
+from utils.streaming import TokenPrinter, stream_answer
+from langchain_core.output_parsers import StrOutputParser
 
 log = logging.getLogger(__name__)
 
@@ -81,9 +83,8 @@ def qa_with_hana_self_query(db, llm, query):
             ("human", human_message),
         ]
 
-        answer = llm.invoke(messages)
         log.info("Answer to the query:")
-        log.info(answer.content)
+        stream_answer(llm | StrOutputParser(), messages)
     except Exception as e:
         log.error(f"Error performing query: {str(e)}")
 
@@ -118,7 +119,8 @@ def qa_documents_with_filters(db, llm, question, advanced_db_filter=None):
         prompt = ChatPromptTemplate.from_messages(messages)
 
         qa_chain = RetrievalQA.from_chain_type(
-            llm,
+            # Stream the answer while it is generated
+            llm.model_copy(update={"streaming": True}),
             chain_type="stuff",
             retriever=db.as_retriever(
                 search_kwargs={"k": 5, "filter": advanced_db_filter}
@@ -128,15 +130,17 @@ def qa_documents_with_filters(db, llm, question, advanced_db_filter=None):
             chain_type_kwargs={"prompt": prompt},
         )
 
-        result = qa_chain.invoke({"query": question})
+        log.info("Result:")
+        token_printer = TokenPrinter()
+        token_printer.start()
+        result = qa_chain.invoke({"query": question}, config={"callbacks": [token_printer]})
+        token_printer.finish()
 
         log.info("Source Documents:")
         for doc in result["source_documents"]:
             log.info(
                 f"Title: {doc.metadata['title']} Page Number: {doc.metadata['page']}"
             )
-
-        log.info(f"Result: {result['result']}")
     except Exception as e:
         log.error(f"Error during QA chain execution: {str(e)}")
 
@@ -1,44 +1,100 @@
+import json
 import logging
+import os
 import re
-import sys
+from concurrent.futures import ThreadPoolExecutor
 
-from langchain_community.document_loaders import GitLoader, PyMuPDFLoader
+from langchain.schema import Document
+from langchain_community.document_loaders import PyMuPDFLoader
 from utils.rag import split_docs_into_chunks
+from utils.dedup import deduplicate_chunks
+from utils.manifest import RESUME_HINT, sync_documents
+from utils.embeddings import log_embedding_cache_stats, log_embedding_request_stats
+from utils.git_loader import (
+    ShallowGitLoader,
+    ingestion_fingerprint,
+    record_ingested_commit,
+)
+from utils.hana import table_has_rows
+from utils.http import download_cached
 
 from helpers.factory import setup_components
-from helpers.config import SAP_DOCS_TABLE_NAME, PODCASTS_TABLE_NAME
+from helpers.config import (
+    SAP_DOCS_TABLE_NAME,
+    PODCASTS_TABLE_NAME,
+    EMBEDDINGS_MODEL_NAME,
+    VECTOR_STORE_BACKEND,
+    DEDUP_THRESHOLD,
+    PODCAST_EPISODES_FILE,
+    PODCAST_DOWNLOAD_WORKERS,
+)
 
 log = logging.getLogger(__name__)
 
+SAP_DOCS_REPO_PATH = "./gen/btp-cloud-platform"
+# Changing the chunking, the deduplication or the embedding model triggers a new
+# ingestion of the same commit
+SAP_DOCS_FINGERPRINT = ingestion_fingerprint(
+    EMBEDDINGS_MODEL_NAME, chunk_size=1000, chunk_overlap=100, dedup_threshold=DEDUP_THRESHOLD
+)
+
 
 def load_documents_from_github():
     """
-    Load documents from a GitHub repository using GitLoader and split them into chunks.
+    Load documents from a GitHub repository using a shallow, sparse clone and split them
+    into chunks.
 
     Returns:
-        List of document chunks.
+        List of document chunks, None if the head commit is already ingested.
     """
     log.info("Getting the documents from the GitHub repository...")
     try:
-        # Load the documents from a GitHub repository using GitLoader
-        loader = GitLoader(
+        # Only fetch and check out the concepts folder of the repository
+        loader = ShallowGitLoader(
             clone_url="https://github.com/SAP-docs/btp-cloud-platform",
-            repo_path="./gen/btp-cloud-platform",
+            repo_path=SAP_DOCS_REPO_PATH,
+            sparse_paths=["docs/10-concepts"],
             file_filter=lambda file_path: re.match(
                 r"^./gen/btp-cloud-platform/docs/10-concepts/.*.md$", file_path
             ),
             branch="main",
         )
+        # The local vector store starts empty in every run, so only skip unchanged commits on HANA
+        if (
+            VECTOR_STORE_BACKEND == "hana"
+            and loader.is_ingested(SAP_DOCS_TABLE_NAME, SAP_DOCS_FINGERPRINT)
+            and table_has_rows(SAP_DOCS_TABLE_NAME)
+        ):
+            log.success(
+                f"Commit {loader.commit_sha[:8]} is already ingested into {SAP_DOCS_TABLE_NAME}, nothing to do."
+            )
+            return None
         text_documents = loader.load()
 
         # Split the documents into chunks
-        chunks = split_docs_into_chunks(documents=text_documents)
+        chunks = split_docs_into_chunks(
+            documents=text_documents, chunk_size=1000, chunk_overlap=100
+        )
+        # The docs repeat boilerplate sections, embed them only once
+        if DEDUP_THRESHOLD:
+            chunks = deduplicate_chunks(chunks, threshold=DEDUP_THRESHOLD)
         return chunks
     except Exception as e:
         log.error(f"Error loading documents from GitHub: {str(e)}")
         return []
 
 
+def load_episodes():
+    """
+    Load the list of podcast episodes to ingest.
+
+    Returns:
+        List of episodes, each with the url, title and episode number.
+    """
+    with open(PODCAST_EPISODES_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
 def ingest_podcasts():
     """
     Ingest Podcast data into HANA db.
@@ -46,40 +102,80 @@ def ingest_podcasts():
     _, _, db = setup_components(PODCASTS_TABLE_NAME)
 
     try:
-        # Clear any existing documents
-        log.info("Deleting existing podcast documents from the table...")
-        db.delete(filter={})
-        log.info("Existing podcast documents deleted successfully!")
-
-        # Podcast data
-        episodes = [
-            {
-                "url": "https://sap-podcast-bucket.s3.amazonaws.com/the-future-of-supply-chain/The_Future_of_Supply_Chain_Episode_64_transcript.pdf",
-                "title": "Future of Supply Chain: Episode 64: Proactively Planning for Risk in Your Supply Chain with Everstream's Koray Kose and SAP's Volker Wilhelm",
-                "episode": 64,
-            },
-            {
-                "url": "https://sap-podcast-bucket.s3.amazonaws.com/the-future-of-supply-chain/The_Future_of_Supply_Chain_Episode_65_transcript.pdf",
-                "title": "The Future of Supply Chain: Episode 65: Grounding Your Supply Chain in Data with Google Cloud’s Paula Natoli",
-                "episode": 65,
-            },
-        ]
-
-        # Process and add documents for each episode
-        for ep in episodes:
-            loader = PyMuPDFLoader(ep["url"])
-            documents = load_and_process_documents(loader, ep["title"], ep["episode"])
-            if documents:
-                db.add_documents(documents)
-                log.info(f"Added documents for episode {ep['episode']} - {ep['title']}")
-            else:
-                log.warning(
-                    f"No documents found for episode {ep['episode']} - {ep['title']}"
-                )
+        episodes = load_episodes()
+
+        # Download and parse the transcripts concurrently, map keeps the episode order
+        podcast_documents = []
+        failed_sources = set()
+        with ThreadPoolExecutor(max_workers=PODCAST_DOWNLOAD_WORKERS) as executor:
+            for ep, documents in zip(episodes, executor.map(load_episode, episodes)):
+                if documents is None:
+                    failed_sources.add(ep["url"])
+                elif documents:
+                    podcast_documents.extend(documents)
+                    log.info(f"Loaded documents for episode {ep['episode']} - {ep['title']}")
+                else:
+                    log.warning(
+                        f"No documents found for episode {ep['episode']} - {ep['title']}"
+                    )
+        if failed_sources:
+            log.warning(
+                f"{len(failed_sources)} episodes could not be loaded, their stored pages are kept."
+            )
+
+        # Embed and add new or changed pages, remove the ones that vanished
+        sync_documents(
+            db, podcast_documents, EMBEDDINGS_MODEL_NAME, keep_sources=failed_sources
+        )
+        log.info("Podcast documents synchronized successfully.")
+    except Exception as e:
+        log.error(f"Error during podcast ingestion: {str(e)}. {RESUME_HINT}")
+
+
+def load_episode(ep):
+    """
+    Download the transcript of an episode into the local cache and parse it.
 
-        log.info("Retriever created successfully.")
+    The download is revalidated with the ETag/Last-Modified of the cached copy, and the
+    parsed pages are cached next to it, so an unchanged transcript is not parsed again.
+
+    Args:
+        ep: The episode, with url, title and episode number.
+
+    Returns:
+        List of documents with added metadata, None if the episode failed.
+    """
+    try:
+        pdf_path, changed = download_cached(ep["url"])
+        pages_path = pdf_path + ".pages.json"
+        if not changed and os.path.exists(pages_path):
+            with open(pages_path, encoding="utf-8") as f:
+                documents = [Document(**page) for page in json.load(f)]
+        else:
+            documents = load_and_process_documents(
+                PyMuPDFLoader(pdf_path), ep["title"], ep["episode"]
+            )
+            # Keep the URL as source, like when parsing the remote file
+            for doc in documents:
+                for key in ("source", "file_path"):
+                    if doc.metadata.get(key) == pdf_path:
+                        doc.metadata[key] = ep["url"]
+            with open(pages_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    [
+                        {"page_content": doc.page_content, "metadata": doc.metadata}
+                        for doc in documents
+                    ],
+                    f,
+                )
+        # The title and episode number come from the episode list, which may have changed
+        for doc in documents:
+            doc.metadata["podcast_title"] = ep["title"]
+            doc.metadata["episode"] = ep["episode"]
+        return documents
     except Exception as e:
-        log.error(f"Error during podcast ingestion: {str(e)}")
+        log.error(f"Error loading episode {ep['episode']} from {ep['url']}: {str(e)}")
+        return None
 
 
 def load_and_process_documents(loader, podcast_title, episode):
@@ -94,41 +190,40 @@ def load_and_process_documents(loader, podcast_title, episode):
     Returns:
         List of documents with added metadata.
     """
-    try:
-        documents = loader.load()
-        for doc in documents:
-            doc.metadata["podcast_title"] = podcast_title
-            doc.metadata["episode"] = episode
-        return documents
-    except Exception as e:
-        log.error(f"Error loading documents for podcast '{podcast_title}': {str(e)}")
-        sys.exit(1)
+    documents = loader.load()
+    for doc in documents:
+        doc.metadata["podcast_title"] = podcast_title
+        doc.metadata["episode"] = episode
+    return documents
 
 
 def ingest_sap_docs():
     """
     Ingest SAP documentation into HANA DB.
     """
-    _, _, db = setup_components(SAP_DOCS_TABLE_NAME)
+    _, embeddings, db = setup_components(SAP_DOCS_TABLE_NAME)
 
     chunks = load_documents_from_github()
 
+    if chunks is None:
+        return
     if not chunks:
         log.warning("No document chunks to ingest.")
         return
 
     try:
-        # Delete already existing documents from the table
-        log.info("Deleting existing SAP BTP documents from the table...")
-        db.delete(filter={})
-        log.info("Existing SAP BTP documents deleted successfully!")
-
-        # Add the loaded document chunks to the HANA DB
-        log.info("Adding SAP BTP document chunks to the HANA DB...")
-        db.add_documents(chunks)
-        log.success("Added SAP btp docs successfully!")
+        # Embed and add new or changed chunks, remove the ones that vanished
+        log.info("Synchronizing SAP BTP document chunks with the HANA DB...")
+        sync_documents(db, chunks, EMBEDDINGS_MODEL_NAME)
+        log.success("Synchronized SAP btp docs successfully!")
+        if VECTOR_STORE_BACKEND == "hana":
+            record_ingested_commit(
+                SAP_DOCS_TABLE_NAME, SAP_DOCS_REPO_PATH, SAP_DOCS_FINGERPRINT
+            )
+        log_embedding_cache_stats(embeddings)
+        log_embedding_request_stats(embeddings)
     except Exception as e:
-        log.error(f"Error during SAP documents ingestion: {str(e)}")
+        log.error(f"Error during SAP documents ingestion: {str(e)}. {RESUME_HINT}")
 
 
 def execute_ingestion():
@@ -6,6 +6,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 
 from utils.env import init_env
+from utils.streaming import stream_answer
 
 from helpers.config import SAP_DOCS_TABLE_NAME
 from helpers.factory import setup_components
@@ -50,8 +51,8 @@ def qa_without_fusion(llm, original_query, prompt, retriever):
     )
     print("Query before rewrite: ", original_query)
 
-    result = chain.invoke(original_query)
-    print("QA result without query rewrite: ", result)
+    print("QA result without query rewrite: ")
+    result, _ = stream_answer(chain, original_query)
     return result
 
 
@@ -91,9 +92,8 @@ def qa_with_rag_fusion(llm, original_query, original_prompt, retriever):
         | StrOutputParser()
     )
 
-    result = chain.invoke(original_query)
-
-    print("Result with RAG Fusion: ", result)
+    print("Result with RAG Fusion: ")
+    stream_answer(chain, original_query)
 
 
 # Define the reciprocal rank fusion function that combines the results from multiple retrievers into a single ranked list
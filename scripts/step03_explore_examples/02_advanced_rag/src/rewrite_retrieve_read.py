@@ -4,6 +4,8 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 
+from utils.streaming import stream_answer
+
 from helpers.factory import setup_components
 from helpers.config import SAP_DOCS_TABLE_NAME
 
@@ -51,8 +53,8 @@ def invoke_query_without_rewrite(llm, simple_query, prompt, retriever):
     )
     print("Query before rewrite: ", simple_query)
 
-    result = chain.invoke(simple_query)
-    print("QA result without query rewrite: ", result)
+    print("QA result without query rewrite: ")
+    result, _ = stream_answer(chain, simple_query)
     return result
 
 
@@ -80,5 +82,5 @@ def invoke_query_with_rewrite(llm, simple_query, prompt, retriever):
         | StrOutputParser()
     )
 
-    rewritten_result = rewrite_retrieve_read_chain.invoke(simple_query)
-    print("QA result after query rewrite: ", rewritten_result)
+    print("QA result after query rewrite: ")
+    stream_answer(rewrite_retrieve_read_chain, simple_query)
@@ -6,6 +6,8 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
 
 
+from utils.streaming import TokenPrinter
+
 from helpers.config import PODCASTS_TABLE_NAME
 from helpers.factory import setup_components
 
@@ -83,7 +85,8 @@ def qa_documents_with_filters(db, llm, question, advanced_db_filter=None):
     )
 
     qa_chain = RetrievalQA.from_chain_type(
-        llm,
+        # Stream the answer while it is generated
+        llm.model_copy(update={"streaming": True}),
         chain_type="stuff",
         retriever=db.as_retriever(search_kwargs={"k": 5, "filter": advanced_db_filter}),
         return_source_documents=True,
@@ -91,10 +94,12 @@ def qa_documents_with_filters(db, llm, question, advanced_db_filter=None):
         chain_type_kwargs={"prompt": prompt},
     )
 
-    result = qa_chain.invoke({"query": question})
+    print("Result:")
+    token_printer = TokenPrinter()
+    token_printer.start()
+    result = qa_chain.invoke({"query": question}, config={"callbacks": [token_printer]})
+    token_printer.finish()
 
     print("Source Documents:")
     for doc in result["source_documents"]:
         print("Title:", doc.metadata["title"], " Page Number:", doc.metadata["page"])
-
-    print("Result:", result["result"])
@@ -1,19 +1,20 @@
 import logging
-import base64
+import os
 import requests
+from utils.images import PreparedImage, prepare_image
 
 log = logging.getLogger(__name__)
 
 
-def load(src: str) -> str:
+def load(src: str) -> PreparedImage:
     """
-    Helper function to load data from a given source.
+    Helper function to load an image from a given source.
 
     Args:
         src (str): The data source, which can be either a URL or a file path.
 
     Returns:
-        str: The loaded data as a string.
+        PreparedImage: The downscaled and recompressed image, base64 encoded, and its MIME type.
     """
 
     log.info("Loading data from source: %s", src)
@@ -24,36 +25,33 @@ def load(src: str) -> str:
         return load_from_fs(src)
 
 
-def fetch_from_url(url: str) -> str:
+def fetch_from_url(url: str) -> PreparedImage:
     """
-    Fetches content from the given URL and returns it as a base64 encoded string.
+    Fetches an image from the given URL and prepares it for the vision model.
 
     Args:
-        url (str): The URL of the content to fetch.
+        url (str): The URL of the image to fetch.
 
     Returns:
-        str: The base64 encoded string representation of the fetched data.
+        PreparedImage: The downscaled and recompressed image, base64 encoded, and its MIME type.
     """
 
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
     }
     response = requests.get(url, headers=headers, timeout=10)
-    content = response.content
+    return prepare_image(response.content, name=url)
 
-    content_base64 = base64.b64encode(content).decode("utf-8")
-    return content_base64
 
-
-def load_from_fs(image_path: str) -> dict:
+def load_from_fs(image_path: str) -> PreparedImage:
     """
-    Load an image file from the specified directory and return it as a base64-encoded string.
+    Load an image file from the specified directory and prepare it for the vision model.
 
     Args:
         image_path (str): The path to the image file.
 
     Returns:
-        dict: A dictionary containing the base64-encoded image string.
+        PreparedImage: The downscaled and recompressed image, base64 encoded, and its MIME type.
 
     Raises:
         ValueError: If the image file format is not supported.
@@ -67,7 +65,7 @@ def load_from_fs(image_path: str) -> dict:
     try:
         with open(image_path, "rb") as f:
             image = f.read()
-        return base64.b64encode(image).decode("utf-8")
+        return prepare_image(image, name=os.path.basename(image_path))
     except Exception as e:
         log.error("Error loading image from directory: %s", e)
         raise
@@ -65,7 +65,7 @@ class TabularDataImageProcessor(ImageProcessorBase):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{self.image.data}"
+                                "url": f"data:{self.image.mime_type};base64,{self.image.data}"
                             },
                         },
                     ]
@@ -100,7 +100,7 @@ class VisualReasoningProcessor(ImageProcessorBase):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{self.image.data}"
+                                "url": f"data:{self.image.mime_type};base64,{self.image.data}"
                             },
                         },
                     ]
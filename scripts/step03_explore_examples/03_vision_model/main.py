@@ -19,13 +19,15 @@ def create_src_path(src):
     return os.path.join(script_dir, src)
 
 
-def load_image(src: str, mime_type: str) -> Image:
+def load_image(src: str) -> Image:
     """
     Factory to load an image from the specified source path and return an Image object.
 
+    The image is downscaled and recompressed before it is sent to the vision model, its
+    MIME type is the one of the prepared image.
+
     Args:
         src (str): The source path of the image.
-        mime_type (str): The MIME type of the image.
 
     Returns:
         Image: An Image object containing the loaded image data.
@@ -33,15 +35,15 @@ def load_image(src: str, mime_type: str) -> Image:
     """
     is_url = src.startswith("http://") or src.startswith("https://")
     full_path = create_src_path(src)
-    image_data: str = load(src) if is_url else load(full_path)
+    prepared = load(src) if is_url else load(full_path)
     return Image(
         src=src,
-        mime_type=mime_type,
-        data=image_data,
+        mime_type=prepared.mime_type,
+        data=prepared.data,
     )
 
 def execute_visual_reasoning_example():
-    image = load_image("images/oil-on-street.jpeg", "image/jpeg")
+    image = load_image("images/oil-on-street.jpeg")
     proxy_client = get_proxy_client("gen-ai-hub")
     llm_with_vision = ChatOpenAI(
         proxy_model_name="gpt-4o",
@@ -54,7 +56,7 @@ def execute_visual_reasoning_example():
 
 
 def execute_tabular_data_example():
-    image = load_image("images/supplement-ingredients.png", "image/png")
+    image = load_image("images/supplement-ingredients.png")
     proxy_client = get_proxy_client("gen-ai-hub")
     llm_with_vision = ChatBedrock(
         model_name="anthropic--claude-3-sonnet",
@@ -2,3 +2,9 @@ LLM_MODEL_NAME = "gpt-4o"
 EMBEDDINGS_MODEL_NAME = "text-embedding-ada-002"
 STRUCTURED_DATA_TABLE_NAME = "CITY_STATS"
 VECTOR_EMBEDDINGS_TABLE_NAME = "CITY_WIKI_PAGES_EMBEDDINGS"
+# Column types of the structured data table, inferred from the rows if None
+STRUCTURED_DATA_SCHEMA = {
+    "CITY_NAME": "NCHAR(16)",
+    "POPULATION": "INTEGER",
+    "COUNTRY": "NCHAR(16)",
+}
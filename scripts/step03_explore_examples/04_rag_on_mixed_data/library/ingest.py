@@ -5,19 +5,23 @@ from gen_ai_hub.proxy.langchain.openai import ChatOpenAI
 from gen_ai_hub.proxy.langchain.openai import OpenAIEmbeddings
 from gen_ai_hub.proxy.core.proxy_clients import get_proxy_client
 from langchain_community.vectorstores.hanavector import HanaDB
-from langchain_community.document_loaders import WikipediaLoader
 
-from utils.rag import split_docs_into_chunks
+from utils.manifest import RESUME_HINT
+from utils.pipeline import stream_documents
+from utils.wiki_loader import CachedWikipediaLoader
+from utils.hana_bulk import bulk_load
 from utils.hana import (
-    get_connection_to_hana_db,
+    hana_connection,
     teardown_hana_table,
     has_embeddings,
+    log_hana_pool_stats,
 )
 
 from .config import (
     LLM_MODEL_NAME,
     EMBEDDINGS_MODEL_NAME,
     STRUCTURED_DATA_TABLE_NAME,
+    STRUCTURED_DATA_SCHEMA,
     VECTOR_EMBEDDINGS_TABLE_NAME,
 )
 
@@ -40,42 +44,36 @@ def create_llm_and_embeddings():
 
 def ingest_unstructured_data(cities):
     try:
-        connection_to_hana = get_connection_to_hana_db()
-
         log.info("Start ingesting unstructured data.")
         log.info("Start fetching documents from Wikipedia")
-        wiki_docs = [
-            WikipediaLoader(query=row["city_name"], load_max_docs=1).load()[0]
-            for row in cities
-        ]
-        log.success(f"Found {len(wiki_docs)} documents from Wikipedia.")
-
-        # Split the documents into chunks
-        chunks = split_docs_into_chunks(documents=wiki_docs)
+        # Pages are fetched concurrently and cached, each page is split and embedded
+        # as soon as it arrives
+        loader = CachedWikipediaLoader([row["city_name"] for row in cities])
 
         _, embeddings = create_llm_and_embeddings()
 
-        # Create the HanaDB object
-        db = HanaDB(
-            embedding=embeddings,
-            connection=connection_to_hana,
-            table_name=VECTOR_EMBEDDINGS_TABLE_NAME,
-        )
+        with hana_connection() as connection_to_hana:
+            # Create the HanaDB object
+            db = HanaDB(
+                embedding=embeddings,
+                connection=connection_to_hana,
+                table_name=VECTOR_EMBEDDINGS_TABLE_NAME,
+            )
 
-        # Delete already existing documents from the table
-        log.info("Cleaning up table with vectoe embeddings.")
-        db.delete(filter={})
-        log.success("Table cleaned up successfully.")
+            # Embed and add new or changed chunks, remove the ones that vanished
+            log.info("Synchronizing the Wikipedia pages with the HANA DB")
+            stream_documents(db, loader.lazy_load(), EMBEDDINGS_MODEL_NAME)
+        log.success(
+            f"Found {loader.stats['cached'] + loader.stats['fetched']} documents from Wikipedia."
+        )
 
-        # add the loaded document chunks to the HANA DB
-        log.info("Adding the loaded document chunks to the HANA DB")
-        db.add_documents(chunks)
         has_embeddings(VECTOR_EMBEDDINGS_TABLE_NAME, verbose=True)
         log.success("Documents added successfully.")
 
         log.success("Unstructured data ingested successfully.")
+        log_hana_pool_stats()
     except Exception as e:
-        log.error(f"Ingesting unstructured data failed: {str(e)}")
+        log.error(f"Ingesting unstructured data failed: {str(e)}. {RESUME_HINT}")
         sys.exit()
 
 
@@ -83,28 +81,20 @@ def ingest_structured_data(cities):
     try:
         log.info("Start ingesting structured data.")
         teardown_hana_table(STRUCTURED_DATA_TABLE_NAME)
-        connection_to_hana = get_connection_to_hana_db()
-        cur = connection_to_hana.cursor()
-
-        cur.execute(
-            f"CREATE TABLE {STRUCTURED_DATA_TABLE_NAME} (CITY_NAME NCHAR(16) PRIMARY KEY, POPULATION INTEGER, COUNTRY NCHAR(16))"
+        # Array-bound inserts in one transaction, instead of one round trip per row
+        bulk_load(
+            STRUCTURED_DATA_TABLE_NAME,
+            cities,
+            schema=STRUCTURED_DATA_SCHEMA,
+            primary_key="CITY_NAME",
         )
 
-        sql = f"INSERT INTO {STRUCTURED_DATA_TABLE_NAME} (CITY_NAME, POPULATION, COUNTRY) VALUES (:city_name, :population, :country)"
-        for city in cities:
-            cur.execute(
-                sql,
-                {
-                    "city_name": city["city_name"],
-                    "population": city["population"],
-                    "country": city["country"],
-                },
-            )
-
-        log.info("Table with structured data created:")
-        cur.execute(f"SELECT * FROM {STRUCTURED_DATA_TABLE_NAME}")
-        log.info(cur.fetchall())
-        cur.close()
+        with hana_connection() as connection_to_hana:
+            cur = connection_to_hana.cursor()
+            log.info("Table with structured data created:")
+            cur.execute(f"SELECT * FROM {STRUCTURED_DATA_TABLE_NAME}")
+            log.info(cur.fetchall())
+            cur.close()
 
         log.success("Structured data ingested successfully.")
     except Exception as e:
@@ -5,6 +5,7 @@ from utils.hana import (
     get_connection_to_hana_db,
     get_connection_string,
 )
+from utils.embeddings import QueryCachedEmbeddings
 
 from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits.sql.base import create_sql_agent
@@ -17,6 +18,7 @@ from .prompts import SQL_AGENT_PREFIX
 from .config import (
     VECTOR_EMBEDDINGS_TABLE_NAME,
     STRUCTURED_DATA_TABLE_NAME,
+    EMBEDDINGS_MODEL_NAME,
 )
 
 log = getLogger(__name__)
@@ -31,7 +33,8 @@ def create_retriever(embeddings):
         connection_to_hana = get_connection_to_hana_db()
 
         vector_db = HanaDB(
-            embedding=embeddings,
+            # Repeated questions are not embedded again
+            embedding=QueryCachedEmbeddings(embeddings, model_name=EMBEDDINGS_MODEL_NAME),
             connection=connection_to_hana,
             table_name=VECTOR_EMBEDDINGS_TABLE_NAME,
         )
@@ -4,6 +4,7 @@ from logging import getLogger
 # local dependencies
 from utils.env import init_env
 from utils.hana import teardown_hana_table
+from utils.embeddings import log_query_cache_stats
 
 from library import (
     create_llm_and_embeddings,
@@ -23,14 +24,16 @@ def main():
     print("Welcome to the interactive Q&A session!\n")
 
     def ask():
-        while True:
-            llm, embeddings = create_llm_and_embeddings()
-            retriever = create_retriever(embeddings)
-            agent_executor = create_agent(llm, retriever)
+        # Build the agent once, the retriever keeps its pooled HANA connection for the whole session
+        llm, embeddings = create_llm_and_embeddings()
+        retriever = create_retriever(embeddings)
+        agent_executor = create_agent(llm, retriever)
 
+        while True:
             question = input("Ask a question or type 'exit' to leave: ")
 
             if question.lower() == "exit":
+                log_query_cache_stats()
                 break
 
             log.info(f"Asking a question: {question}")
@@ -1,3 +1,4 @@
 from .config import *
 from .ingest import *
+from .partition import *
 from .retrieve import *
@@ -2,3 +2,20 @@ LLM_MODEL_NAME = "gpt-4o"
 EMBEDDINGS_MODEL_NAME = "text-embedding-ada-002"
 TABLE_NAME = "MULTI_MODAL_RAG"
 ID_KEY = "doc_id"
+# Number of element summaries requested from the LLM at the same time
+SUMMARY_MAX_CONCURRENCY = 8
+# Part of the summary cache key, increase it when changing a summary prompt
+SUMMARY_PROMPT_VERSION = 1
+# Keyword arguments of partition_pdf, part of the key of the cached partitions
+PARTITION_PDF_PARAMETERS = {
+    # Using pdf format to find embedded image blocks
+    "extract_images_in_pdf": True,
+    # Use layout model (YOLOX) to get bounding boxes (for tables) and find titles
+    # Titles are any sub-section of the document
+    "infer_table_structure": True,
+    # Post processing to aggregate text once we have the title
+    "chunking_strategy": "by_title",
+    "max_characters": 6000,
+    "new_after_n_chars": 3800,
+    "combine_text_under_n_chars": 2000,
+}
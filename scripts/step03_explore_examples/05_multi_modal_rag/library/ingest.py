@@ -1,14 +1,18 @@
 from logging import getLogger
 import os
-import base64
+import hashlib
 import requests
-import uuid
 from langchain.schema.messages import HumanMessage, AIMessage
 from langchain.schema.document import Document
-from unstructured.partition.pdf import partition_pdf
 from utils.fs import get_script_dir
+from utils.images import prepare_image
+from utils.llm_batch import batch_invoke
+from library.partition import partition_pdf_cached
 from library.config import (
     ID_KEY,
+    LLM_MODEL_NAME,
+    SUMMARY_MAX_CONCURRENCY,
+    SUMMARY_PROMPT_VERSION,
 )
 
 log = getLogger(__name__)
@@ -27,51 +31,142 @@ def load_pdf_from_url(url, path_to_folder):
 
 
 def encode_image(image_path):
+    # Downscaled and recompressed as data URL, with the MIME type of the prepared image
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+        prepared = prepare_image(image_file.read(), name=os.path.basename(image_path))
+    return prepared.data_url
 
 
-# Function for text summaries
-def summarize_text(llm, text_element):
+# Prompt for text summaries
+def text_summary_prompt(text_element):
     prompt = f"Summarize the following text:\n\n{text_element}\n\nSummary:"
-    response = llm.invoke([HumanMessage(content=prompt)])
-    return response.content
+    return [HumanMessage(content=prompt)]
 
 
-# Function for table summaries
-def summarize_table(llm, table_element):
+# Prompt for table summaries
+def table_summary_prompt(table_element):
     prompt = f"Summarize the following table:\n\n{table_element}\n\nSummary:"
-    response = llm.invoke([HumanMessage(content=prompt)])
-    return response.content
+    return [HumanMessage(content=prompt)]
 
 
-# Function for image summaries
-def summarize_image(llm_with_vision, encoded_image):
-    prompt = [
+# Prompt for image summaries
+def image_summary_prompt(image_url):
+    return [
         AIMessage(content="You are a bot that is good at analyzing images."),
         HumanMessage(
             content=[
                 {"type": "text", "text": "Describe the contents of this image."},
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"},
+                    "image_url": {"url": image_url},
                 },
             ]
         ),
     ]
-    response = llm_with_vision.invoke(prompt)
-    return response.content
+
+
+SUMMARY_PROMPTS = {
+    "table": table_summary_prompt,
+    "text": text_summary_prompt,
+    "image": image_summary_prompt,
+}
+
+
+def summary_cache_key(llm, kind, element):
+    # A summary depends on the model, the prompt and the element, nothing else
+    model_name = getattr(llm, "proxy_model_name", None) or LLM_MODEL_NAME
+    element_hash = hashlib.sha256(element.encode("utf-8")).hexdigest()
+    return f"summary:{model_name}:{SUMMARY_PROMPT_VERSION}:{kind}:{element_hash}"
+
+
+def summarize_elements(llm, elements):
+    """
+    Summarizes elements concurrently, reusing the cached summaries of elements that were
+    summarized before with the same model and prompt version.
+
+    Args:
+        llm: The chat model, with vision for image elements.
+        elements: List of (kind, element) with kind "table", "text" or "image".
+
+    Returns:
+        List of summaries, in the order of the elements.
+    """
+    return batch_invoke(
+        llm,
+        [SUMMARY_PROMPTS[kind](element) for kind, element in elements],
+        max_concurrency=SUMMARY_MAX_CONCURRENCY,
+        description="elements",
+        cache_keys=[summary_cache_key(llm, kind, element) for kind, element in elements],
+    )
+
+
+# Function for text summaries
+def summarize_text(llm, text_element):
+    return summarize_elements(llm, [("text", text_element)])[0]
+
+
+# Function for table summaries
+def summarize_table(llm, table_element):
+    return summarize_elements(llm, [("table", table_element)])[0]
+
+
+# Function for image summaries
+def summarize_image(llm_with_vision, image_url):
+    return summarize_elements(llm_with_vision, [("image", image_url)])[0]
+
+
+def element_doc_id(source, llm, kind, element):
+    # Prefixed with the source document, so stale entries can be removed per document
+    return f"{source}|{summary_cache_key(llm, kind, element)}"
 
 
 # Function to add documents to the retriever
-def add_documents_to_retriever(retriever, summaries, original_contents):
-    doc_ids = [str(uuid.uuid4()) for _ in summaries]
-    summary_docs = [
-        Document(page_content=s, metadata={ID_KEY: doc_ids[i]})
-        for i, s in enumerate(summaries)
+def add_documents_to_retriever(retriever, summaries, original_contents, doc_ids):
+    """
+    Adds the summaries to the vector store and the original contents to the docstore.
+
+    The doc ids are derived from the content, like the summary cache keys, so elements
+    that are already stored under their id are skipped and re-ingesting an unchanged
+    document adds nothing.
+    """
+    stored = retriever.docstore.mget(doc_ids)
+    new = {}
+    for doc_id, summary, content, existing in zip(
+        doc_ids, summaries, original_contents, stored
+    ):
+        if existing is None and doc_id not in new:
+            new[doc_id] = (summary, content)
+
+    if new:
+        # Vectors without docstore entry are left over if the docstore was deleted
+        retriever.vectorstore.delete(filter={ID_KEY: {"$in": list(new)}})
+        retriever.vectorstore.add_documents(
+            [
+                Document(page_content=summary, metadata={ID_KEY: doc_id})
+                for doc_id, (summary, _) in new.items()
+            ]
+        )
+        retriever.docstore.mset([(doc_id, content) for doc_id, (_, content) in new.items()])
+    log.info(f"Added {len(new)} documents, {len(set(doc_ids)) - len(new)} were already stored")
+
+
+def remove_stale_documents(retriever, source, doc_ids):
+    """
+    Deletes the summaries and original contents of elements of the source that are no
+    longer part of it, or were summarized with another model or prompt version. Only ids
+    of this source are considered (see element_doc_id), the elements of other documents
+    in the same table are kept.
+    """
+    current = set(doc_ids)
+    stale = [
+        doc_id
+        for doc_id in retriever.docstore.yield_keys(prefix=f"{source}|")
+        if doc_id not in current
     ]
-    retriever.vectorstore.add_documents(summary_docs)
-    retriever.docstore.mset(list(zip(doc_ids, original_contents)))
+    if stale:
+        retriever.vectorstore.delete(filter={ID_KEY: {"$in": stale}})
+        retriever.docstore.mdelete(stale)
+    log.info(f"Removed {len(stale)} stale documents")
 
 
 def ingest_data_with_unstructured(llm, retriever):
@@ -84,29 +179,10 @@ def ingest_data_with_unstructured(llm, retriever):
     data_dir = os.path.join(script_dir, "gen/data")
     os.makedirs(data_dir, exist_ok=True)
     # Load the PDF file to ingest
-    pdf_file_path = load_pdf_from_url(
-        "https://datasheets.tdx.henkel.com/LOCTITE-HY-4090GY-en_GL.pdf",
-        data_dir
-
-    )
-    # Set output directory for Images
-    output_path = os.path.join(data_dir, "output_images")
-
-    # Get elements
-    raw_pdf_elements = partition_pdf(
-        filename=pdf_file_path,
-        # Using pdf format to find embedded image blocks
-        extract_images_in_pdf=True,
-        # Use layout model (YOLOX) to get bounding boxes (for tables) and find titles
-        # Titles are any sub-section of the document
-        infer_table_structure=True,
-        # Post processing to aggregate text once we have the title
-        chunking_strategy="by_title",
-        max_characters=6000,
-        new_after_n_chars=3800,
-        combine_text_under_n_chars=2000,
-        extract_image_block_output_dir=output_path,
-    )
+    pdf_url = "https://datasheets.tdx.henkel.com/LOCTITE-HY-4090GY-en_GL.pdf"
+    pdf_file_path = load_pdf_from_url(pdf_url, data_dir)
+    # Get elements, the layout inference only runs for a PDF that was not partitioned before
+    raw_pdf_elements, output_path = partition_pdf_cached(pdf_file_path)
 
     for element in raw_pdf_elements:
         if "CompositeElement" in str(type(element)):
@@ -127,39 +203,42 @@ def ingest_data_with_unstructured(llm, retriever):
     print(f"Text Elements: {len(text_elements)}")
     print(f"Images: {len(image_elements)}")
 
-    # Summarise text, table and images
-    table_summaries = []
-    for i, te in enumerate(table_elements):
-        summary = summarize_table(llm, te)
-        table_summaries.append(summary)
-        print(f"{i + 1}th element of tables processed.")
-
-    text_summaries = []
-    for i, te in enumerate(text_elements):
-        summary = summarize_text(llm, te)
-        text_summaries.append(summary)
-        print(f"{i + 1}th element of texts processed.")
-
-    image_summaries = []
-    for i, ie in enumerate(image_elements):
-        summary = summarize_image(llm, ie)
-        image_summaries.append(summary)
-        print(f"{i + 1}th element of images processed.")
+    # Summarise tables, texts and images concurrently, in one pool so no request slot
+    # idles between the element types. Unchanged elements reuse their cached summary.
+    summaries = summarize_elements(
+        llm,
+        [("table", te) for te in table_elements]
+        + [("text", te) for te in text_elements]
+        + [("image", ie) for ie in image_elements],
+    )
+    table_summaries = summaries[: len(table_elements)]
+    text_summaries = summaries[
+        len(table_elements) : len(table_elements) + len(text_elements)
+    ]
+    image_summaries = summaries[len(table_elements) + len(text_elements) :]
 
     print(f"Example Text Summary: {text_summaries[0]}")
     print(f"Example Table Summary: {table_summaries[0]}")
     print(f"Example Image Summary: {image_summaries[0]}")
 
+    # The doc ids are the PDF plus the summary cache keys, so a changed element, model
+    # or prompt version gets a new id and replaces the old entry
+    table_ids = [element_doc_id(pdf_url, llm, "table", te) for te in table_elements]
+    text_ids = [element_doc_id(pdf_url, llm, "text", te) for te in text_elements]
+    image_ids = [element_doc_id(pdf_url, llm, "image", ie) for ie in image_elements]
+
     # Add text summaries
-    add_documents_to_retriever(retriever, text_summaries, text_elements)
+    add_documents_to_retriever(retriever, text_summaries, text_elements, text_ids)
 
     # Add table summaries
-    add_documents_to_retriever(retriever, table_summaries, table_elements)
+    add_documents_to_retriever(retriever, table_summaries, table_elements, table_ids)
 
     # Add image summaries
     add_documents_to_retriever(
-        retriever, image_summaries, image_summaries
+        retriever, image_summaries, image_summaries, image_ids
     )  # hopefully real images soon
 
+    remove_stale_documents(retriever, pdf_url, table_ids + text_ids + image_ids)
+
     log.success("Data ingestion completed.")
 
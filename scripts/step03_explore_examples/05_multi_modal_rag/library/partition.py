@@ -0,0 +1,156 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+
+from unstructured.__version__ import __version__ as unstructured_version
+from unstructured.partition.pdf import partition_pdf
+from unstructured.staging.base import elements_from_json, elements_to_json
+from utils.kvstore import CACHE_DIR
+from library.config import PARTITION_PDF_PARAMETERS
+
+__all__ = [
+    "PARTITION_CACHE_DIR",
+    "PARTITION_MAX_WORKERS",
+    "partition_cache_key",
+    "partition_pdf_cached",
+    "partition_pdfs",
+    "partition_directory",
+]
+
+log = getLogger(__name__)
+
+PARTITION_CACHE_DIR = os.path.join(CACHE_DIR, "partitions")
+# The layout model already uses several threads per process
+PARTITION_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_ELEMENTS_FILE = "elements.json"
+_IMAGES_DIR = "images"
+
+
+def partition_cache_key(pdf_file_path, parameters=PARTITION_PDF_PARAMETERS):
+    # The elements depend on the PDF, the partition parameters and the unstructured version
+    digest = hashlib.sha256()
+    with open(pdf_file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    digest.update(json.dumps(parameters, sort_keys=True).encode("utf-8"))
+    digest.update(unstructured_version.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _partition_into_cache(pdf_file_path, cache_path, parameters):
+    # A folder without the elements file is left over from an interrupted run
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.makedirs(os.path.join(cache_path, _IMAGES_DIR))
+
+    started = time.perf_counter()
+    elements = partition_pdf(
+        filename=pdf_file_path,
+        extract_image_block_output_dir=os.path.join(cache_path, _IMAGES_DIR),
+        **parameters,
+    )
+    # Written last, it marks the cache entry as complete
+    elements_to_json(elements, filename=os.path.join(cache_path, _ELEMENTS_FILE))
+    log.info(
+        f"Partitioned {os.path.basename(pdf_file_path)} into {len(elements)} elements "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return cache_path
+
+
+def _load_from_cache(cache_path):
+    elements = elements_from_json(filename=os.path.join(cache_path, _ELEMENTS_FILE))
+    return elements, os.path.join(cache_path, _IMAGES_DIR)
+
+
+def partition_pdf_cached(pdf_file_path, parameters=PARTITION_PDF_PARAMETERS):
+    """
+    Partition a PDF with unstructured, reusing the result of an earlier run.
+
+    The elements and the extracted image files are cached on disk under the hash of the
+    PDF content, the partition parameters and the unstructured version, so an unchanged
+    PDF skips the layout inference.
+
+    Args:
+        pdf_file_path: The path of the PDF file.
+        parameters: The keyword arguments of partition_pdf, without filename and
+            extract_image_block_output_dir.
+
+    Returns:
+        Tuple of the elements and the folder with the extracted images.
+    """
+    cache_path = os.path.join(
+        PARTITION_CACHE_DIR, partition_cache_key(pdf_file_path, parameters)
+    )
+    if os.path.exists(os.path.join(cache_path, _ELEMENTS_FILE)):
+        log.info(f"Using the cached partition of {os.path.basename(pdf_file_path)}")
+    else:
+        _partition_into_cache(pdf_file_path, cache_path, parameters)
+    return _load_from_cache(cache_path)
+
+
+def partition_pdfs(
+    pdf_file_paths, parameters=PARTITION_PDF_PARAMETERS, max_workers=PARTITION_MAX_WORKERS
+):
+    """
+    Partition many PDFs, the ones without a cached result on a process pool.
+
+    Args:
+        pdf_file_paths: The paths of the PDF files.
+        parameters: The keyword arguments of partition_pdf.
+        max_workers: The number of processes.
+
+    Returns:
+        List of (elements, image folder) tuples, in the order of the PDF files.
+    """
+    cache_paths = [
+        os.path.join(PARTITION_CACHE_DIR, partition_cache_key(path, parameters))
+        for path in pdf_file_paths
+    ]
+    # Identical PDFs are partitioned once
+    pending = {
+        cache_path: path
+        for path, cache_path in zip(pdf_file_paths, cache_paths)
+        if not os.path.exists(os.path.join(cache_path, _ELEMENTS_FILE))
+    }
+    log.info(
+        f"Partitioning {len(pending)} of {len(pdf_file_paths)} PDFs, "
+        f"the others are cached or duplicates"
+    )
+
+    if pending:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            list(
+                executor.map(
+                    _partition_into_cache,
+                    pending.values(),
+                    pending.keys(),
+                    [parameters] * len(pending),
+                )
+            )
+        log.success(
+            f"Partitioned {len(pending)} PDFs in {time.perf_counter() - started:.1f}s "
+            f"with {min(max_workers, len(pending))} processes"
+        )
+
+    return [_load_from_cache(cache_path) for cache_path in cache_paths]
+
+
+def partition_directory(
+    directory, parameters=PARTITION_PDF_PARAMETERS, max_workers=PARTITION_MAX_WORKERS
+):
+    """
+    Partition all PDFs in a directory, see partition_pdfs.
+
+    Returns:
+        Dict of the PDF file paths to their (elements, image folder) tuples.
+    """
+    pdf_file_paths = sorted(glob.glob(os.path.join(directory, "*.pdf")))
+    results = partition_pdfs(pdf_file_paths, parameters=parameters, max_workers=max_workers)
+    return dict(zip(pdf_file_paths, results))
@@ -3,13 +3,15 @@ from logging import getLogger
 from utils.hana import (
     get_connection_to_hana_db,
 )
-from langchain.schema.runnable import RunnablePassthrough
+from utils.embeddings import QueryCachedEmbeddings, log_query_cache_stats
+from utils.streaming import stream_answer
+from utils.docstore import PersistentDocStore, docstore_path
+from langchain.schema.runnable import RunnableParallel, RunnablePassthrough
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema.output_parser import StrOutputParser
 from langchain_community.vectorstores.hanavector import HanaDB
-from langchain.storage import InMemoryStore
 from langchain.retrievers.multi_vector import MultiVectorRetriever
-from .config import TABLE_NAME, ID_KEY
+from .config import TABLE_NAME, ID_KEY, EMBEDDINGS_MODEL_NAME
 
 log = getLogger(__name__)
 
@@ -22,12 +24,14 @@ def create_retriever(embeddings):
         connection_to_hana = get_connection_to_hana_db()
 
         vectorstore = HanaDB(
-            embedding=embeddings,
+            # Repeated questions are not embedded again
+            embedding=QueryCachedEmbeddings(embeddings, model_name=EMBEDDINGS_MODEL_NAME),
             connection=connection_to_hana,
             table_name=TABLE_NAME,
         )
 
-        store = InMemoryStore()
+        # The original contents are kept on disk, so they survive restarts
+        store = PersistentDocStore(docstore_path(TABLE_NAME))
 
         # Initialize the retriever
         retriever = MultiVectorRetriever(
@@ -49,15 +53,13 @@ def ask(llm, retriever):
     """
     prompt = ChatPromptTemplate.from_template(template)
 
-    chain = (
+    # Keep the retrieved context next to the answer, so it can be shown once the answer is streamed
+    chain = RunnableParallel(
         {
             "context": retriever,
             "question": RunnablePassthrough(),
         }
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    ).assign(answer=prompt | llm | StrOutputParser())
 
     log.header(
         "Welcome to the interactive Q&A session! Type 'exit' to end the session."
@@ -68,6 +70,7 @@ def ask(llm, retriever):
 
         # Check if the user wants to exit
         if question.lower() == "exit":
+            log_query_cache_stats()
             break
 
         log.info(
@@ -75,7 +78,14 @@ def ask(llm, retriever):
         )
 
         # Invoke the conversational retrieval chain with the user's question
-        # Output the answer from LLM
+        # Output the answer from LLM while it is generated
         log.success("Answer from LLM:")
-        result = chain.invoke(question)
-        print(result)
+        _, outputs = stream_answer(chain, question, answer_key="answer")
+
+        # Output the source elements used for the answer
+        sources = outputs.get("context", [])
+        log.info(f"Number of used source elements: {len(sources)}")
+        for source in sources:
+            content = source.page_content if hasattr(source, "page_content") else str(source)
+            print("-" * 80)
+            log.info(content[:300])
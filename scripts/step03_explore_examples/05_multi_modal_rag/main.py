@@ -46,6 +46,7 @@ def main():
 
         if option == "0":
             retriever.vectorstore.delete(filter={})
+            retriever.docstore.clear()
             continue
         if option == "1":
             ingest_data_with_unstructured(llm, retriever)
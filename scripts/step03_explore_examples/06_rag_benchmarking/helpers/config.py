@@ -1,7 +1,28 @@
 LLM_MODEL_NAME = "gpt-35-turbo"
 EMBEDDINGS_MODEL_NAME = "text-embedding-ada-002"
+# "hana" for SAP HANA Cloud or "local" for the in-process vector store (no database required)
+VECTOR_STORE_BACKEND = "hana"
 TERRAFORM_DOCS_TABLE_NAME = "TERRAFORM"
+# Unit of the chunk size and overlap: "characters", or "tokens" counted with the tokenizer
+# of the embedding model (e.g. CHUNK_SIZE = 256 and CHUNK_OVERLAP = 32)
+CHUNK_LENGTH = "characters"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+# Merge chunks with at least this estimated Jaccard similarity before embedding them,
+# None to keep all chunks (and stream the documents into the table)
+DEDUP_THRESHOLD = 0.9
 GENERATOR_LLM = "gpt-4o"
 CRITIC_LLM = "gpt-4o"
 TEST_SIZE = 5  #Number of test questions to generate
-TESTSET_RELATIVE_FILE_PATH = "data/golden_test_set.csv"
\ No newline at end of file
+TESTSET_RELATIVE_FILE_PATH = "data/golden_test_set.csv"
+# Questions used to compare exact and HNSW indexed vector search
+VECTOR_INDEX_BENCHMARK_QUERIES = [
+    "What is Terraform?",
+    "How to set up a Terraform provider for SAP BTP?",
+    "How do I create a subaccount with Terraform?",
+    "How can I assign a role collection to a user?",
+    "How do I create an entitlement for a service plan?",
+    "Which authentication methods does the provider support?",
+    "How to import an existing directory?",
+    "How do I subscribe to an application?",
+]
@@ -1,15 +1,24 @@
 import sys
 
 from utils.env import init_env
-from utils.hana import teardown_hana_table as execute_teardown_hana_table
-from helpers.config import TERRAFORM_DOCS_TABLE_NAME
+from utils.hana import teardown_hana_table
+from utils.local_vectorstore import drop_local_vector_store
+from helpers.config import TERRAFORM_DOCS_TABLE_NAME, VECTOR_STORE_BACKEND
 from src import (
     execute_ingestion,
     generate_golden_testset,
     evaluate_without_golden_testset,
     evaluate_with_golden_testset,
+    benchmark_vector_index,
+    benchmark_chunking,
 )
 
+def execute_teardown_table(table_name):
+    if VECTOR_STORE_BACKEND == "local":
+        drop_local_vector_store(table_name)
+    else:
+        teardown_hana_table(table_name)
+
 def main():
     # Load environment variables
     init_env()
@@ -25,12 +34,14 @@ def main():
         print("2: RAG Benchmarking with LLM-as-a-judge")        
         print("3: Generate Golden Test Set with Ragas Framework")
         print("4: RAG Benchmarking with LLM-as-a-judge using golden test set")        
-        print("5: Exit\n")
+        print("5: Benchmark exact vs. HNSW indexed vector search")
+        print("6: Benchmark serial vs. parallel document chunking")
+        print("7: Exit\n")
 
         option = input("Which task would you like to run?").strip()
 
         if option == "0":
-            execute_teardown_hana_table(TERRAFORM_DOCS_TABLE_NAME)
+            execute_teardown_table(TERRAFORM_DOCS_TABLE_NAME)
             continue
         elif option == "1":
             execute_ingestion()
@@ -45,6 +56,12 @@ def main():
             evaluate_with_golden_testset()
             continue        
         elif option == "5":
+            benchmark_vector_index()
+            continue
+        elif option == "6":
+            benchmark_chunking()
+            continue
+        elif option == "7":
             print("Goodbye!")
             sys.exit()
         else:
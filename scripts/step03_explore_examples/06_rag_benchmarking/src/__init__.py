@@ -1,4 +1,6 @@
 from .ingest import execute_ingestion
 from .generate_golden_testset import generate_golden_testset
 from .evaluate_without_golden_testset import evaluate_without_golden_testset
-from .evaluate_with_golden_testset import evaluate_with_golden_testset
\ No newline at end of file
+from .evaluate_with_golden_testset import evaluate_with_golden_testset
+from .benchmark_vector_index import benchmark_vector_index
+from .benchmark_chunking import benchmark_chunking
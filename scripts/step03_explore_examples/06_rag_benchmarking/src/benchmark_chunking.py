@@ -0,0 +1,22 @@
+import logging
+
+from utils.benchmark import benchmark_parallel_split, benchmark_text_splitter
+from utils.ingest_docs import fetch_terraform_docs
+
+log = logging.getLogger(__name__)
+
+def benchmark_chunking():
+    """
+    Compares the in-project splitter with LangChain's RecursiveCharacterTextSplitter and
+    the chunks per second of the serial and the process pool split of the Terraform docs
+    for different numbers of worker processes.
+    """
+    try:
+        documents = fetch_terraform_docs()
+        if not documents:
+            log.warning("No documents to split.")
+            return
+        benchmark_text_splitter(documents)
+        benchmark_parallel_split(documents)
+    except Exception as e:
+        log.error(f"Error occurred while benchmarking the chunking: {str(e)}")
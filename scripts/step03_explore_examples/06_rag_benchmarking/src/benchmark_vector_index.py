@@ -0,0 +1,22 @@
+import logging
+
+from langchain_community.vectorstores.hanavector import HanaDB
+from utils.benchmark import benchmark_vector_index as run_vector_index_benchmark
+from helpers.config import TERRAFORM_DOCS_TABLE_NAME, VECTOR_INDEX_BENCHMARK_QUERIES
+from helpers.factory import setup_components
+
+log = logging.getLogger(__name__)
+
+def benchmark_vector_index():
+    """
+    Compares the latency and recall of exact and HNSW indexed vector search on the
+    ingested Terraform docs.
+    """
+    try:
+        _, _, db = setup_components(TERRAFORM_DOCS_TABLE_NAME)
+        if not isinstance(db, HanaDB):
+            log.warning("The vector index benchmark requires the HANA vector store backend.")
+            return
+        run_vector_index_benchmark(db, VECTOR_INDEX_BENCHMARK_QUERIES, k=4)
+    except Exception as e:
+        log.error(f"Error occurred while benchmarking the vector index: {str(e)}")
@@ -3,6 +3,7 @@ import sys
 import csv
 from pathlib import Path
 
+from utils.embeddings import log_query_cache_stats
 from rag_benchmark_utils.common_utils import create_retriever, validate_response, print_results
 from helpers.config import TERRAFORM_DOCS_TABLE_NAME, TESTSET_RELATIVE_FILE_PATH
 
@@ -107,4 +108,5 @@ def evaluate_with_golden_testset():
         "Context Relevance": 10,
         "Validation result reasoning": 40,
     }    
-    print_results(results, headers, accuracy, column_width)    
\ No newline at end of file
+    print_results(results, headers, accuracy, column_width)
+    log_query_cache_stats()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import logging
 
+from utils.embeddings import log_query_cache_stats
 from rag_benchmark_utils.common_utils import create_retriever, validate_response, print_results
 from helpers.config import TERRAFORM_DOCS_TABLE_NAME
 
@@ -40,4 +41,5 @@ def evaluate_without_golden_testset():
             results.append([query, NA, FAILED, FAILED])
 
     headers = ["Query", "Actual Answer", "Total rating", "Validation result reasoning"]
-    print_results(results, headers)
\ No newline at end of file
+    print_results(results, headers)
+    log_query_cache_stats()
\ No newline at end of file
@@ -1,9 +1,47 @@
-from utils.ingest_docs import fetch_terraform_docs, ingest_docs
-from helpers.config import TERRAFORM_DOCS_TABLE_NAME, EMBEDDINGS_MODEL_NAME
+from logging import getLogger
+
+from utils.git_loader import ingestion_fingerprint
+from utils.ingest_docs import TERRAFORM_DOCS_REPO_PATH, fetch_terraform_docs, ingest_docs
+from helpers.config import (
+    TERRAFORM_DOCS_TABLE_NAME,
+    EMBEDDINGS_MODEL_NAME,
+    VECTOR_STORE_BACKEND,
+    CHUNK_LENGTH,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    DEDUP_THRESHOLD,
+)
+
+log = getLogger(__name__)
 
 def ingest_terraform_docs():
-    documents = fetch_terraform_docs()
-    ingest_docs(documents, TERRAFORM_DOCS_TABLE_NAME, EMBEDDINGS_MODEL_NAME)
+    # The local vector store starts empty in every run, so only skip unchanged commits on HANA
+    hana_table = TERRAFORM_DOCS_TABLE_NAME if VECTOR_STORE_BACKEND == "hana" else None
+    # Must match the fingerprint ingest_docs records for the same parameters
+    fingerprint = ingestion_fingerprint(
+        EMBEDDINGS_MODEL_NAME,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        chunk_length=CHUNK_LENGTH,
+        dedup_threshold=DEDUP_THRESHOLD,
+    )
+    try:
+        documents = fetch_terraform_docs(hana_table, lazy=True, fingerprint=fingerprint)
+    except Exception:
+        log.error("Ingestion aborted, the documents could not be loaded.")
+        return
+    ingest_docs(
+        documents,
+        TERRAFORM_DOCS_TABLE_NAME,
+        EMBEDDINGS_MODEL_NAME,
+        build_vector_index=True,
+        backend=VECTOR_STORE_BACKEND,
+        repo_path=TERRAFORM_DOCS_REPO_PATH,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        chunk_length=CHUNK_LENGTH,
+        dedup_threshold=DEDUP_THRESHOLD,
+    )
 
 def execute_ingestion():
     ingest_terraform_docs()
\ No newline at end of file
@@ -0,0 +1,130 @@
+import random
+
+import pytest
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from utils.text_splitter import OffsetRecursiveTextSplitter
+
+MARKDOWN = """# Resource: btp_subaccount
+
+Creates a subaccount in a global account or directory.
+
+## Example Usage
+
+```terraform
+resource "btp_subaccount" "my_project" {
+  name      = "My Project"
+  subdomain = "my-project"
+  region    = "us10"
+}
+```
+
+## Schema
+
+### Required
+
+- `name` (String) The descriptive name of the subaccount for customer-facing UIs.
+- `region` (String) The region in which the subaccount was created.
+- `subdomain` (String) The subdomain that becomes part of the path used to access the authorization tenant of the subaccount.
+
+### Optional
+
+- `beta_enabled` (Boolean) Shows whether the subaccount can use beta services and applications.
+- `description` (String) The description of the subaccount for customer-facing UIs.
+"""
+
+# Repeated paragraphs make the same chunk text appear at several offsets
+REPETITIVE = "\n\n".join(
+    ["Lorem ipsum dolor sit amet, consectetur adipiscing elit."] * 40
+    + ["abc abc abc abc\nabc abc abc abc"] * 40
+)
+
+# No separator at all, the splitters fall back to single characters
+NO_SEPARATORS = "x" * 1234
+
+WORDS = ["terraform", "btp", "subaccount", "a", "of", "the", "entitlement", "xyzzy" * 12]
+GLUE = [" ", " ", " ", "  ", "\n", "\n\n", "\n \n", "\t"]
+
+
+def _reference(**kwargs) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(length_function=len, **kwargs)
+
+
+def _assert_same_chunks(text: str, **kwargs):
+    expected = _reference(add_start_index=True, **kwargs).create_documents([text])
+    actual = OffsetRecursiveTextSplitter(add_start_index=True, **kwargs).create_documents(
+        [text]
+    )
+    assert [(d.page_content, d.metadata) for d in actual] == [
+        (d.page_content, d.metadata) for d in expected
+    ]
+    assert OffsetRecursiveTextSplitter(**kwargs).split_text(text) == _reference(
+        **kwargs
+    ).split_text(text)
+
+
+def _random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 400)):
+        parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(GLUE))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(1000, 100), (200, 20), (50, 0)])
+def test_markdown(chunk_size, chunk_overlap):
+    _assert_same_chunks(MARKDOWN, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(100, 30), (60, 59), (35, 0)])
+def test_start_index_of_repetitive_text(chunk_size, chunk_overlap):
+    _assert_same_chunks(REPETITIVE, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(100, 10), (7, 3), (1, 0)])
+def test_empty_separator_fallback(chunk_size, chunk_overlap):
+    _assert_same_chunks(NO_SEPARATORS, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    _assert_same_chunks(
+        MARKDOWN, chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=["\n\n", ""]
+    )
+
+
+def test_no_overlap():
+    _assert_same_chunks(MARKDOWN + REPETITIVE, chunk_size=120, chunk_overlap=0)
+
+
+@pytest.mark.parametrize("text", [MARKDOWN, REPETITIVE, "  \n\n  leading and trailing  \n\n  "])
+def test_without_stripping_whitespace(text):
+    _assert_same_chunks(text, chunk_size=80, chunk_overlap=10, strip_whitespace=False)
+
+
+@pytest.mark.parametrize("text", ["", " ", "\n\n\n", "short"])
+def test_trivial_texts(text):
+    _assert_same_chunks(text, chunk_size=10, chunk_overlap=2)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_texts(seed):
+    rng = random.Random(seed)
+    chunk_size = rng.randint(1, 300)
+    _assert_same_chunks(
+        _random_text(rng),
+        chunk_size=chunk_size,
+        chunk_overlap=rng.randint(0, chunk_size),
+        strip_whitespace=rng.random() < 0.8,
+    )
+
+
+def test_split_documents_keeps_metadata():
+    documents = [
+        Document(page_content=MARKDOWN, metadata={"source": "a.md", "tags": ["docs"]}),
+        Document(page_content=REPETITIVE, metadata={"source": "b.md"}),
+    ]
+    expected = _reference(chunk_size=200, chunk_overlap=20, add_start_index=True)
+    actual = OffsetRecursiveTextSplitter(chunk_size=200, chunk_overlap=20, add_start_index=True)
+    chunks = actual.split_documents(documents)
+    assert chunks == expected.split_documents(documents)
+    # Nested metadata is copied, not shared between the chunks
+    chunks[0].metadata["tags"].append("changed")
+    assert chunks[1].metadata["tags"] == ["docs"]
@@ -0,0 +1,261 @@
+import json
+import os
+import statistics
+import time
+from logging import getLogger
+
+from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores.hanavector import HanaDB
+
+from .hana import (
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH,
+    HNSW_M,
+    create_vector_index,
+    drop_vector_index,
+)
+from .rag import create_text_splitter, split_docs_in_parallel
+from .text_splitter import OffsetRecursiveTextSplitter
+
+log = getLogger(__name__)
+
+
+def _document_id(document: Document) -> str:
+    return document.page_content + json.dumps(document.metadata, sort_keys=True)
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+
+def _run_searches(db: HanaDB, query_vectors: list[list[float]], k: int):
+    # Warm up, so plan compilation is not part of the measurement
+    db.similarity_search_by_vector(query_vectors[0], k=k)
+
+    latencies, results = [], []
+    for vector in query_vectors:
+        started = time.perf_counter()
+        documents = db.similarity_search_by_vector(vector, k=k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([_document_id(document) for document in documents])
+    return latencies, results
+
+
+def _latency_summary(latencies: list[float]) -> dict:
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+    }
+
+
+def benchmark_vector_index(
+    db: HanaDB,
+    queries: list[str],
+    k: int = 4,
+    m: int = HNSW_M,
+    ef_construction: int = HNSW_EF_CONSTRUCTION,
+    ef_search: int = HNSW_EF_SEARCH,
+    keep_index: bool = True,
+) -> dict:
+    """
+    Compares exact and HNSW indexed similarity search on the table of the vector store.
+
+    The queries are embedded once. They are run as exact scans without an index first,
+    then the HNSW index is created with the given parameters and the queries are run
+    again. Recall@k is the share of the exact top k results the indexed search returns.
+
+    Args:
+        db (HanaDB): The vector store with the ingested table.
+        queries (list[str]): The questions to search for.
+        k (int, optional): The number of results per query. Defaults to 4.
+        m, ef_construction, ef_search (int, optional): The HNSW index parameters.
+        keep_index (bool, optional): Keep the index after the benchmark. Defaults to True.
+
+    Returns:
+        dict: The latency summaries of both modes, the recall and the index build time.
+    """
+    assert queries, "At least one query is required"
+
+    query_vectors = [db.embedding.embed_query(query) for query in queries]
+
+    drop_vector_index(db.table_name, vector_column=db.vector_column)
+    log.info(f"Running {len(queries)} exact searches on {db.table_name}")
+    exact_latencies, exact_results = _run_searches(db, query_vectors, k)
+
+    started = time.perf_counter()
+    create_vector_index(
+        db.table_name,
+        vector_column=db.vector_column,
+        m=m,
+        ef_construction=ef_construction,
+        ef_search=ef_search,
+    )
+    build_seconds = time.perf_counter() - started
+
+    try:
+        log.info(f"Running {len(queries)} indexed searches on {db.table_name}")
+        indexed_latencies, indexed_results = _run_searches(db, query_vectors, k)
+    finally:
+        if not keep_index:
+            drop_vector_index(db.table_name, vector_column=db.vector_column)
+
+    recalls = [
+        len(set(exact) & set(indexed)) / len(exact)
+        for exact, indexed in zip(exact_results, indexed_results)
+        if exact
+    ]
+    result = {
+        "queries": len(queries),
+        "k": k,
+        "exact": _latency_summary(exact_latencies),
+        "indexed": _latency_summary(indexed_latencies),
+        "recall": statistics.mean(recalls) if recalls else 0.0,
+        "index_build_seconds": build_seconds,
+    }
+    log_vector_index_benchmark(db.table_name, result)
+    return result
+
+
+def log_vector_index_benchmark(table_name: str, result: dict):
+    log.header(f"Vector search on {table_name}: {result['queries']} queries, top {result['k']}")
+    for mode in ("exact", "indexed"):
+        latency = result[mode]
+        log.info(
+            f"{mode:>8}: mean {latency['mean_ms']:.1f} ms, "
+            f"p50 {latency['p50_ms']:.1f} ms, p95 {latency['p95_ms']:.1f} ms"
+        )
+    log.info(
+        f"Recall@{result['k']} of the indexed search: {result['recall']:.1%}, "
+        f"index built in {result['index_build_seconds']:.1f}s"
+    )
+
+
+def benchmark_parallel_split(
+    documents: list[Document],
+    worker_counts: list[int] = None,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+) -> list[dict]:
+    """
+    Measures the chunks per second of the serial split and of the process pool split
+    with different numbers of workers, and checks that all of them return the same chunks.
+
+    Args:
+        documents (list[Document]): The documents to split.
+        worker_counts (list[int], optional): The numbers of worker processes to measure.
+            Defaults to powers of two up to the CPU count.
+        chunk_size (int, optional): The size of each chunk. Defaults to 1000.
+        chunk_overlap (int, optional): The overlap between consecutive chunks. Defaults to 100.
+
+    Returns:
+        list[dict]: Workers, seconds, chunks per second and speedup per run, the serial
+            split first (0 workers).
+    """
+    if worker_counts is None:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = [2**i for i in range(cpu_count.bit_length()) if 2**i <= cpu_count]
+        if worker_counts[-1] != cpu_count:
+            worker_counts.append(cpu_count)
+
+    started = time.perf_counter()
+    expected = create_text_splitter(chunk_size, chunk_overlap).split_documents(documents)
+    serial_seconds = time.perf_counter() - started
+    expected_ids = [_document_id(chunk) for chunk in expected]
+
+    results = [{"workers": 0, "seconds": serial_seconds}]
+    for workers in worker_counts:
+        started = time.perf_counter()
+        chunks = split_docs_in_parallel(
+            documents, chunk_size, chunk_overlap, max_workers=workers
+        )
+        seconds = time.perf_counter() - started
+        if [_document_id(chunk) for chunk in chunks] != expected_ids:
+            raise AssertionError(f"The split with {workers} workers differs from the serial split")
+        results.append({"workers": workers, "seconds": seconds})
+
+    for result in results:
+        result["chunks_per_second"] = len(expected) / result["seconds"] if result["seconds"] else 0.0
+        result["speedup"] = serial_seconds / result["seconds"] if result["seconds"] else 0.0
+
+    log.header(
+        f"Splitting {len(documents)} documents into {len(expected)} chunks "
+        f"({sum(len(d.page_content) for d in documents)} characters)"
+    )
+    for result in results:
+        mode = f"{result['workers']} workers" if result["workers"] else "serial"
+        log.info(
+            f"{mode:>10}: {result['seconds']:.2f}s, "
+            f"{result['chunks_per_second']:.0f} chunks/s, speedup {result['speedup']:.2f}x"
+        )
+    log.success("All parallel splits returned the same chunks as the serial split.")
+    return results
+
+
+def benchmark_text_splitter(
+    documents: list[Document],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    repeats: int = 3,
+) -> dict:
+    """
+    Compares OffsetRecursiveTextSplitter with LangChain's RecursiveCharacterTextSplitter.
+
+    Both split the documents with the same settings. The chunks must be equal one by
+    one, text and metadata including `start_index`, otherwise an AssertionError is raised.
+    The best of `repeats` runs is reported for each splitter.
+
+    Returns:
+        dict: The number of chunks, the seconds of both splitters and the speedup.
+    """
+    langchain_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        add_start_index=True,
+    )
+    offset_splitter = OffsetRecursiveTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+
+    def best_of(splitter):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            chunks = splitter.split_documents(documents)
+            timings.append(time.perf_counter() - started)
+        return chunks, min(timings)
+
+    expected, langchain_seconds = best_of(langchain_splitter)
+    chunks, offset_seconds = best_of(offset_splitter)
+
+    if len(chunks) != len(expected):
+        raise AssertionError(f"Got {len(chunks)} chunks, expected {len(expected)}")
+    for position, (chunk, expected_chunk) in enumerate(zip(chunks, expected)):
+        if chunk.page_content != expected_chunk.page_content:
+            raise AssertionError(f"The text of chunk {position} differs")
+        if chunk.metadata != expected_chunk.metadata:
+            raise AssertionError(
+                f"The metadata of chunk {position} differs: "
+                f"{chunk.metadata} != {expected_chunk.metadata}"
+            )
+
+    result = {
+        "chunks": len(chunks),
+        "langchain_seconds": langchain_seconds,
+        "offset_seconds": offset_seconds,
+        "speedup": langchain_seconds / offset_seconds if offset_seconds else 0.0,
+    }
+    log.header(
+        f"Splitting {len(documents)} documents into {len(chunks)} chunks "
+        f"of {chunk_size} characters"
+    )
+    log.info(f"RecursiveCharacterTextSplitter: {langchain_seconds:.3f}s")
+    log.info(
+        f"   OffsetRecursiveTextSplitter: {offset_seconds:.3f}s "
+        f"(speedup {result['speedup']:.2f}x)"
+    )
+    log.success("Both splitters returned the same chunks.")
+    return result
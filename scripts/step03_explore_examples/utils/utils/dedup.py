@@ -0,0 +1,175 @@
+import re
+import zlib
+from dataclasses import dataclass
+from logging import getLogger
+
+import numpy as np
+from langchain.schema import Document
+
+from .tokens import count_tokens_batch
+
+log = getLogger(__name__)
+
+# Chunks whose estimated Jaccard similarity reaches the threshold are merged
+DEDUP_THRESHOLD = 0.9
+DEDUP_NUM_PERMUTATIONS = 128
+# Number of consecutive words per shingle
+DEDUP_SHINGLE_SIZE = 3
+# Metadata key listing the sources of the chunks merged into a representative
+MERGED_SOURCES_KEY = "merged_sources"
+# For the savings report: vector size of ada-002 / text-embedding-3-small and price
+EMBEDDING_DIMENSIONS = 1536
+EMBEDDING_PRICE_PER_1K_TOKENS = 0.0001
+
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class DedupReport:
+    chunks_in: int = 0
+    chunks_out: int = 0
+    tokens_saved: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.chunks_in - self.chunks_out
+
+    @property
+    def cost_saved(self) -> float:
+        return self.tokens_saved / 1000 * EMBEDDING_PRICE_PER_1K_TOKENS
+
+    def __str__(self):
+        share = self.removed / self.chunks_in if self.chunks_in else 0.0
+        return (
+            f"{self.removed} of {self.chunks_in} chunks merged ({share:.1%}), "
+            f"{self.tokens_saved} tokens (~${self.cost_saved:.4f}) not embedded, "
+            f"~{self.bytes_saved / 1024 / 1024:.1f} MB less in the table"
+        )
+
+
+def _optimal_bands(threshold: float, num_permutations: int) -> tuple[int, int]:
+    # Choose bands x rows so that the LSH S-curve turns at the threshold
+    candidates = [
+        (bands, num_permutations // bands)
+        for bands in range(1, num_permutations + 1)
+        if num_permutations % bands == 0
+    ]
+    return min(candidates, key=lambda c: abs((1 / c[0]) ** (1 / c[1]) - threshold))
+
+
+class MinHashDeduplicator:
+    """
+    Merges near-duplicate chunks with MinHash signatures and locality-sensitive hashing.
+
+    Each chunk is reduced to the set of its word shingles and a MinHash signature, which
+    estimates the Jaccard similarity between two chunks. LSH bands find the candidates,
+    so a chunk is only compared to chunks sharing a band. Chunks are processed in order:
+    the first chunk of a group of near-duplicates is kept as representative and the
+    sources of the others are added to its `merged_sources` metadata.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_permutations: int = DEDUP_NUM_PERMUTATIONS,
+        shingle_size: int = DEDUP_SHINGLE_SIZE,
+        seed: int = 1,
+    ):
+        assert 0 < threshold <= 1, "Threshold must be in (0, 1]"
+
+        self.threshold = threshold
+        self.num_permutations = num_permutations
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _optimal_bands(threshold, num_permutations)
+
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, _PRIME, size=num_permutations, dtype=np.uint64)
+        self._b = generator.integers(0, _PRIME, size=num_permutations, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {
+            zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+            for i in range(max(1, len(words) - size + 1))
+        }
+        hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        # (a * h + b) mod p for all shingles and permutations, minimum per permutation
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def deduplicate(self, chunks: list[Document]) -> tuple[list[Document], DedupReport]:
+        """
+        Returns the representatives of the chunks, in their original order, and a report
+        of the savings.
+        """
+        buckets = [{} for _ in range(self.bands)]
+        representatives, signatures, duplicates = [], [], []
+
+        for chunk in chunks:
+            signature = self.signature(chunk.page_content)
+            band_keys = [
+                signature[band * self.rows : (band + 1) * self.rows].tobytes()
+                for band in range(self.bands)
+            ]
+
+            match = None
+            candidates = {
+                index
+                for band, key in enumerate(band_keys)
+                for index in buckets[band].get(key, ())
+            }
+            for index in sorted(candidates):
+                if np.mean(signatures[index] == signature) >= self.threshold:
+                    match = index
+                    break
+
+            if match is not None:
+                self._merge(representatives[match], chunk)
+                duplicates.append(chunk)
+                continue
+
+            index = len(representatives)
+            representatives.append(chunk)
+            signatures.append(signature)
+            for band, key in enumerate(band_keys):
+                buckets[band].setdefault(key, []).append(index)
+
+        report = DedupReport(chunks_in=len(chunks), chunks_out=len(representatives))
+        if duplicates:
+            texts = [chunk.page_content for chunk in duplicates]
+            report.tokens_saved = sum(count_tokens_batch(texts))
+            report.bytes_saved = sum(
+                len(text.encode("utf-8")) + EMBEDDING_DIMENSIONS * 4 for text in texts
+            )
+        return representatives, report
+
+    @staticmethod
+    def _merge(representative: Document, duplicate: Document):
+        source = duplicate.metadata.get("source")
+        if source is None or source == representative.metadata.get("source"):
+            return
+        merged = representative.metadata.setdefault(MERGED_SOURCES_KEY, [])
+        if source not in merged:
+            merged.append(source)
+
+
+def deduplicate_chunks(
+    chunks: list[Document], threshold: float = DEDUP_THRESHOLD
+) -> list[Document]:
+    """
+    Merges near-duplicate chunks before they are embedded and logs the savings.
+
+    Args:
+        chunks (list[Document]): The chunks, e.g. from `split_docs_into_chunks`.
+        threshold (float, optional): The Jaccard similarity from which two chunks are
+            near-duplicates. Defaults to DEDUP_THRESHOLD.
+
+    Returns:
+        list[Document]: One representative per group of near-duplicates, in the original
+            order, with the sources of the merged chunks in `merged_sources`.
+    """
+    representatives, report = MinHashDeduplicator(threshold=threshold).deduplicate(chunks)
+    log.info(f"Deduplication: {report}")
+    return representatives
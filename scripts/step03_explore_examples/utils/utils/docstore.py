@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Iterator, Optional, Sequence
+
+from langchain.schema import Document
+from langchain_core.stores import BaseStore
+
+from .kvstore import CACHE_DIR, SqliteKVStore
+
+log = getLogger(__name__)
+
+# Number of documents kept in memory by the read cache of a PersistentDocStore
+DOCSTORE_READ_CACHE_ENTRIES = 1024
+
+
+def docstore_path(name: str) -> str:
+    return os.path.join(CACHE_DIR, f"docstore_{name.lower()}.sqlite")
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, Document):
+        payload = {"page_content": value.page_content, "metadata": value.metadata}
+    elif isinstance(value, str):
+        payload = {"text": value}
+    else:
+        raise TypeError(f"Cannot store values of type {type(value).__name__}")
+    return json.dumps(payload).encode("utf-8")
+
+
+def _decode(value: bytes) -> Any:
+    payload = json.loads(value)
+    if "text" in payload:
+        return payload["text"]
+    return Document(page_content=payload["page_content"], metadata=payload["metadata"])
+
+
+class PersistentDocStore(BaseStore[str, Any]):
+    """
+    A docstore for the MultiVectorRetriever that survives restarts.
+
+    Drop-in replacement for InMemoryStore with Document and str values. The values are
+    kept in a local sqlite database and only read when they are requested, so opening
+    the store is instant and the memory does not grow with the corpus. Recently read
+    values are kept in a bounded LRU cache. `mget` and `mset` read and write all keys in
+    one statement per 500 keys.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        read_cache_entries: int = DOCSTORE_READ_CACHE_ENTRIES,
+    ):
+        self.store = SqliteKVStore(path)
+        self.read_cache_entries = read_cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def mget(self, keys: Sequence[str]) -> list[Optional[Any]]:
+        values = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    values[key] = self._cache[key]
+            self.hits += len(values)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in values]
+        if missing:
+            loaded = {
+                key: _decode(value)
+                for key, value in zip(missing, self.store.mget(missing))
+                if value is not None
+            }
+            values.update(loaded)
+            with self._lock:
+                self.misses += len(missing)
+                for key, value in loaded.items():
+                    self._remember(key, value)
+
+        return [values.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[tuple[str, Any]]):
+        self.store.mset([(key, _encode(value)) for key, value in key_value_pairs])
+        with self._lock:
+            for key, value in key_value_pairs:
+                self._remember(key, value)
+
+    def mdelete(self, keys: Sequence[str]):
+        self.store.delete(list(keys))
+        with self._lock:
+            for key in keys:
+                self._cache.pop(key, None)
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        yield from self.store.yield_keys(prefix=prefix)
+
+    def clear(self):
+        """
+        Deletes all stored values.
+        """
+        self.mdelete(list(self.yield_keys()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached": len(self._cache),
+                "stored_bytes": self.store.size_bytes(),
+            }
+
+    def _remember(self, key: str, value: Any):
+        # Must be called with the lock held
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.read_cache_entries:
+            self._cache.popitem(last=False)
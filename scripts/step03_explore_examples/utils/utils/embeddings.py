@@ -0,0 +1,433 @@
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+
+from langchain_core.embeddings import Embeddings
+
+from .kvstore import CACHE_DIR, SqliteKVStore
+from .retry import is_retryable, status_code
+from .tokens import count_tokens_batch
+
+log = getLogger(__name__)
+
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite")
+# Upper bound for the on-disk embedding cache, ~80k ada-002 vectors
+EMBEDDING_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Embedding requests sent to the AI Core proxy in parallel
+EMBEDDING_MAX_CONCURRENCY = int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", 4))
+# Upper bounds for the texts packed into a single embedding request, the token budget
+# is counted with the tokenizer of the embedding model
+EMBEDDING_MAX_TOKENS_PER_REQUEST = int(os.environ.get("EMBEDDING_MAX_TOKENS_PER_REQUEST", 8000))
+# Input limit of a single text for the OpenAI embedding models
+EMBEDDING_MODEL_MAX_TOKENS = 8191
+EMBEDDING_MAX_TEXTS_PER_REQUEST = 64
+EMBEDDING_MAX_RETRIES = 6
+
+# In-memory cache for the embeddings of questions asked in the interactive loops
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_TTL_SECONDS = 3600
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(
+    path: str = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES
+) -> SqliteKVStore:
+    """
+    Returns the shared on-disk store for cached embeddings at the given path.
+    """
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SqliteKVStore(path, max_bytes=max_bytes)
+        return _stores[path]
+
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFC", text).strip()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Caches the vectors of an embedding model on disk.
+
+    Vectors are keyed by the model name and the hash of the normalized text, so the
+    same chunk is only ever embedded once per model, no matter which example or table
+    it is ingested into. Only cache misses are sent to the wrapped embedding model.
+    Vectors are stored as float32, the precision of the HANA REAL_VECTOR type.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, store: SqliteKVStore = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store or get_embedding_store()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, kind="document")
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([text], kind="query")[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size_bytes": self.store.size_bytes(),
+            }
+
+    def _embed(self, texts: list[str], kind: str) -> list[list[float]]:
+        keys = [self._key(text, kind) for text in texts]
+        cached = self.store.mget(keys)
+        vectors = [_unpack(value) if value is not None else None for value in cached]
+
+        # Send every missing text upstream once, even if it occurs several times
+        missing = {}
+        for index, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[index], []).append(index)
+
+        if missing:
+            missing_texts = [texts[indices[0]] for indices in missing.values()]
+            if kind == "query":
+                embedded = [self.embeddings.embed_query(missing_texts[0])]
+            else:
+                embedded = self.embeddings.embed_documents(missing_texts)
+
+            self.store.mset(
+                [(key, _pack(vector)) for key, vector in zip(missing, embedded)]
+            )
+            for indices, vector in zip(missing.values(), embedded):
+                for index in indices:
+                    vectors[index] = vector
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+
+        return vectors
+
+    def _key(self, text: str, kind: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(value: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(value)
+    return vector.tolist()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of requests in flight and adapts the limit to the responses.
+
+    The limit is halved whenever the server throttles (429) or fails (5xx) and grows by
+    one again after a series of successful requests, up to the configured maximum.
+    """
+
+    def __init__(self, max_concurrency: int, increase_after: int = 5, name: str = "Embedding"):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.increase_after = increase_after
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.max_concurrency:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def on_throttled(self):
+        with self._condition:
+            self._successes = 0
+            if self.limit > 1:
+                self.limit = max(1, self.limit // 2)
+                log.warning(f"{self.name} requests throttled, concurrency reduced to {self.limit}")
+
+
+class ConcurrentEmbeddings(Embeddings):
+    """
+    Dispatches embedding requests concurrently.
+
+    The texts are packed into requests up to a token budget, counted with the tokenizer
+    of `model_name`, and the requests run on a thread pool. The
+    number of requests in flight adapts to the AI Core proxy: throttled (429) and failed
+    (5xx) requests reduce the concurrency and are retried with exponential backoff. The
+    vectors are returned in the order of the input texts.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str = None,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        max_tokens_per_request: int = EMBEDDING_MAX_TOKENS_PER_REQUEST,
+        max_texts_per_request: int = EMBEDDING_MAX_TEXTS_PER_REQUEST,
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+    ):
+        assert max_concurrency > 0, "Concurrency must be greater than 0"
+
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_texts_per_request = max_texts_per_request
+        self.max_retries = max_retries
+        self.limiter = AdaptiveConcurrencyLimiter(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="embeddings"
+        )
+        self.requests = 0
+        self.texts = 0
+        self.tokens = 0
+        self.max_request_tokens = 0
+        self._stats_lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        requests = self._pack(texts)
+        if len(requests) == 1:
+            return self._embed_with_retries(requests[0])
+
+        vectors = []
+        # map() yields the results in the order of the requests
+        for result in self._executor.map(self._embed_with_retries, requests):
+            vectors.extend(result)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "tokens": self.tokens,
+                "tokens_per_request": self.tokens / self.requests if self.requests else 0.0,
+                "max_request_tokens": self.max_request_tokens,
+            }
+
+    def _pack(self, texts: list[str]) -> list[list[str]]:
+        requests, request_tokens = [], []
+        current, current_tokens = [], 0
+        for text, tokens in zip(texts, count_tokens_batch(texts, self.model_name)):
+            if tokens > EMBEDDING_MODEL_MAX_TOKENS:
+                log.warning(
+                    f"A text of {tokens} tokens exceeds the input limit of the embedding model"
+                )
+            if current and (
+                current_tokens + tokens > self.max_tokens_per_request
+                or len(current) >= self.max_texts_per_request
+            ):
+                requests.append(current)
+                request_tokens.append(current_tokens)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            requests.append(current)
+            request_tokens.append(current_tokens)
+
+        with self._stats_lock:
+            self.requests += len(requests)
+            self.texts += len(texts)
+            self.tokens += sum(request_tokens)
+            self.max_request_tokens = max([self.max_request_tokens, *request_tokens])
+        return requests
+
+    def _embed_with_retries(self, texts: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.limiter:
+                    vectors = self.embeddings.embed_documents(texts)
+                self.limiter.on_success()
+                return vectors
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                self.limiter.on_throttled()
+                delay = min(60, 2**attempt) * (0.5 + random.random())
+                log.warning(
+                    f"Embedding request failed with status {status_code(e)}, "
+                    f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})"
+                )
+                time.sleep(delay)
+
+
+def normalize_question(question: str) -> str:
+    # Questions that only differ in case or whitespace share their embedding
+    return re.sub(r"\s+", " ", normalize_text(question)).casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    A bounded LRU cache with a time to live for query embeddings.
+
+    Besides the vector, each entry keeps the time it took to embed the question, so
+    every hit can report the latency it saved.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = QUERY_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns (vector, embedding seconds) for the key, None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[1]
+            return entry[0], entry[1]
+
+    def put(self, key, vector: list[float], seconds: float):
+        with self._lock:
+            self._entries[key] = (vector, seconds, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+_query_cache = QueryEmbeddingCache()
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """
+    Keeps the embeddings of recent questions in memory, in front of `embed_query`.
+
+    All instances share one process wide cache, so retrievers that are created again
+    (e.g. by the benchmark runners) reuse the embeddings of identical questions.
+    Document embeddings are passed through unchanged.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, model_name: str, cache: QueryEmbeddingCache = None
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or _query_cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = (self.model_name, normalize_question(text))
+        cached = self.cache.get(key)
+        if cached is not None:
+            vector, seconds = cached
+            log.info(f"Reused the embedding of the question, saved {seconds * 1000:.0f} ms")
+            return vector
+
+        started = time.perf_counter()
+        vector = self.embeddings.embed_query(text.strip())
+        seconds = time.perf_counter() - started
+        self.cache.put(key, vector, seconds)
+        log.debug(f"Embedded the question in {seconds * 1000:.0f} ms")
+        return vector
+
+
+def log_query_cache_stats():
+    """
+    Logs the hit/miss counters and the total embedding latency saved by the query cache.
+    """
+    stats = _query_cache.stats()
+    log.info(
+        "Query embedding cache: {entries} entries, {hits} hits, {misses} misses, "
+        "{saved_seconds:.1f}s embedding latency saved".format(**stats)
+    )
+
+
+def log_embedding_cache_stats(embeddings: Embeddings):
+    """
+    Logs the hit/miss counters if the embeddings are cached.
+    """
+    if not isinstance(embeddings, CachedEmbeddings):
+        return
+    stats = embeddings.stats()
+    log.info(
+        "Embedding cache ({model}): {hits} hits, {misses} misses ({hit_rate:.0%} hit rate), "
+        "{size_mb:.1f} MB on disk".format(
+            model=embeddings.model_name,
+            size_mb=stats["size_bytes"] / 1024 / 1024,
+            **stats,
+        )
+    )
+
+
+def log_embedding_request_stats(embeddings: Embeddings):
+    """
+    Logs the number of embedding requests and their size if the requests are packed
+    by ConcurrentEmbeddings, also when it is wrapped by the caches.
+    """
+    while not isinstance(embeddings, ConcurrentEmbeddings):
+        embeddings = getattr(embeddings, "embeddings", None)
+        if embeddings is None:
+            return
+    stats = embeddings.stats()
+    log.info(
+        "Embedding requests: {requests} requests for {texts} texts, "
+        "{tokens_per_request:.0f} tokens per request on average (max {max_request_tokens}, "
+        "budget {budget})".format(budget=embeddings.max_tokens_per_request, **stats)
+    )
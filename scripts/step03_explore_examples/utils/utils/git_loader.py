@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from langchain.schema import Document
+from langchain_community.document_loaders.base import BaseLoader
+
+from .kvstore import CACHE_DIR
+
+log = getLogger(__name__)
+
+# Records which commit of a repository was ingested into which table
+GIT_STATE_PATH = os.path.join(CACHE_DIR, "ingested_commits.json")
+GIT_READ_WORKERS = 8
+
+_state_lock = threading.Lock()
+
+
+class ShallowGitLoader(BaseLoader):
+    """
+    Loads text files from a Git repository like GitLoader, but without its full clone.
+
+    The repository is cloned with depth 1 and without blobs (`--filter=blob:none`), and
+    only the `sparse_paths` are checked out, so only the needed files are downloaded.
+    An existing clone at `repo_path` is updated with a shallow fetch instead. The matched
+    files are read in parallel. The documents carry the same metadata as with GitLoader,
+    and `file_filter` receives the same paths (`repo_path` joined with the file path).
+    """
+
+    def __init__(
+        self,
+        clone_url: str,
+        repo_path: str,
+        branch: str = "main",
+        sparse_paths: Optional[list[str]] = None,
+        file_filter: Optional[Callable[[str], bool]] = None,
+        max_workers: int = GIT_READ_WORKERS,
+    ):
+        self.clone_url = clone_url
+        self.repo_path = repo_path
+        self.branch = branch
+        self.sparse_paths = sparse_paths
+        self.file_filter = file_filter
+        self.max_workers = max_workers
+        self.commit_sha = None
+        self._repo = None
+
+    def sync(self) -> str:
+        """
+        Clones or updates the repository and returns the commit SHA of the branch head.
+        """
+        from git import Repo
+
+        started = time.perf_counter()
+        if os.path.isdir(os.path.join(self.repo_path, ".git")):
+            repo = Repo(self.repo_path)
+            if repo.remotes.origin.url != self.clone_url:
+                raise ValueError("A different repository is already cloned at this path.")
+            repo.git.fetch("--depth", "1", "origin", self.branch)
+            self._apply_sparse_paths(repo)
+            repo.git.checkout("--force", "-B", self.branch, "FETCH_HEAD")
+            mode = "warm"
+        else:
+            repo = Repo.clone_from(
+                self.clone_url,
+                self.repo_path,
+                depth=1,
+                branch=self.branch,
+                single_branch=True,
+                filter="blob:none",
+                no_checkout=True,
+            )
+            self._apply_sparse_paths(repo)
+            repo.git.checkout(self.branch)
+            mode = "cold"
+
+        self._repo = repo
+        self.commit_sha = repo.head.commit.hexsha
+        log.info(
+            f"Synced {self.clone_url}@{self.commit_sha[:8]} ({mode}) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return self.commit_sha
+
+    def lazy_load(self) -> Iterator[Document]:
+        from git import Blob
+
+        if self._repo is None:
+            self.sync()
+
+        started = time.perf_counter()
+        candidates = []
+        for item in self._repo.tree().traverse():
+            if not isinstance(item, Blob):
+                continue
+            file_path = os.path.join(self.repo_path, item.path)
+            # Files outside of the sparse checkout are not on disk
+            if not os.path.isfile(file_path):
+                continue
+            if self.file_filter and not self.file_filter(file_path):
+                continue
+            candidates.append((file_path, item.name))
+
+        # Read a few files ahead in parallel, but only hold one window in memory
+        read = 0
+        window = self.max_workers * 4
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(candidates), window):
+                for document in executor.map(
+                    lambda c: self._read(*c), candidates[start : start + window]
+                ):
+                    if document is not None:
+                        read += 1
+                        yield document
+        log.info(
+            f"Read {read} files from {self.repo_path} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def is_ingested(self, state_key: str, fingerprint: Optional[str] = None) -> bool:
+        """
+        Syncs the repository and tells whether its head commit was already ingested
+        under the given key (usually the table name) with the same ingestion parameters,
+        see `ingestion_fingerprint`.
+        """
+        commit_sha = self.commit_sha or self.sync()
+        return get_ingested_state(state_key) == {
+            "commit": commit_sha,
+            "fingerprint": fingerprint,
+        }
+
+    def _apply_sparse_paths(self, repo):
+        if self.sparse_paths:
+            repo.git.sparse_checkout("set", *self.sparse_paths)
+        else:
+            # Restores the full checkout of a clone that was sparse before, no-op otherwise
+            repo.git.sparse_checkout("disable")
+
+    def _read(self, file_path: str, file_name: str) -> Optional[Document]:
+        rel_file_path = os.path.relpath(file_path, self.repo_path)
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+        except OSError as e:
+            log.warning(f"Error reading file {file_path}: {e}")
+            return None
+
+        # Loads only text files
+        try:
+            text_content = content.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+        metadata = {
+            "source": rel_file_path,
+            "file_path": rel_file_path,
+            "file_name": file_name,
+            "file_type": os.path.splitext(file_name)[1],
+        }
+        return Document(page_content=text_content, metadata=metadata)
+
+
+def ingestion_fingerprint(embeddings_model_name: str, **parameters) -> str:
+    """
+    Returns a short hash of the parameters the chunks of a table are built with, e.g.
+    the chunk size, overlap and length, the deduplication threshold and the embedding
+    model. Recorded with the ingested commit, so changing any of them triggers a new
+    ingestion of an unchanged commit.
+    """
+    parameters["embeddings_model_name"] = embeddings_model_name
+    payload = json.dumps(parameters, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_state() -> dict:
+    try:
+        with open(GIT_STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def get_ingested_state(state_key: str) -> Optional[dict]:
+    """
+    Returns the commit and the ingestion fingerprint recorded under the key.
+    """
+    with _state_lock:
+        return _read_state().get(state_key)
+
+
+def get_ingested_commit(state_key: str) -> Optional[str]:
+    state = get_ingested_state(state_key)
+    return state["commit"] if state else None
+
+
+def record_ingested_commit(state_key: str, repo_path: str, fingerprint: Optional[str] = None):
+    """
+    Records the commit currently checked out at `repo_path` as ingested under the key,
+    with the fingerprint of the ingestion parameters. Call it after the ingestion succeeded.
+    """
+    from git import Repo
+
+    commit_sha = Repo(repo_path).head.commit.hexsha
+    with _state_lock:
+        state = _read_state()
+        state[state_key] = {"commit": commit_sha, "fingerprint": fingerprint}
+        Path(GIT_STATE_PATH).parent.mkdir(parents=True, exist_ok=True)
+        with open(GIT_STATE_PATH, "w") as f:
+            json.dump(state, f, indent=2)
+    log.info(f"Recorded commit {commit_sha[:8]} as ingested into {state_key}")
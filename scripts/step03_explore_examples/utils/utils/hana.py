@@ -1,6 +1,12 @@
 from logging import getLogger
+from collections import deque
+import json
+from contextlib import contextmanager
+import atexit
 import os
 import sys
+import threading
+import time
 from hdbcli import dbapi
 from .env import assert_env
 from .logging import initLogger
@@ -8,25 +14,366 @@ from .logging import initLogger
 log = getLogger(__name__)
 initLogger()
 
+# Connection pool settings, can be overridden through the environment
+POOL_MAX_SIZE = int(os.environ.get("HANA_DB_POOL_MAX_SIZE", 5))
+POOL_TIMEOUT_SECONDS = float(os.environ.get("HANA_DB_POOL_TIMEOUT", 30))
+POOL_MAX_IDLE_SECONDS = float(os.environ.get("HANA_DB_POOL_MAX_IDLE", 300))
+POOL_HEALTH_CHECK_AFTER_SECONDS = float(
+    os.environ.get("HANA_DB_POOL_HEALTH_CHECK_AFTER", 30)
+)
 
-def check_if_exists(table_name, schema_name="DBADMIN"):
-    connection_to_hana = get_connection_to_hana_db()
-    cursor = connection_to_hana.cursor()
+# Default HNSW vector index parameters. M and efConstruction trade build time and
+# memory for recall, efSearch trades query latency for recall.
+HNSW_M = 64
+HNSW_EF_CONSTRUCTION = 128
+HNSW_EF_SEARCH = 200
+
+
+class PooledConnection:
+    """
+    Wraps a hdbcli connection checked out from a HanaConnectionPool.
+
+    All attributes are delegated to the underlying connection, so the object can be
+    handed to HanaDB and friends. Calling close() (or leaving a `with` block) returns
+    the connection to the pool instead of closing the socket. Connections that are
+    never closed explicitly are returned once the wrapper is garbage collected.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        connection = self.__dict__.get("_connection")
+        if connection is None:
+            raise dbapi.ProgrammingError("Connection has been returned to the pool")
+        return getattr(connection, name)
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._pool.checkin(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class HanaConnectionPool:
+    """
+    A bounded, thread-safe pool of connections to the HANA database.
+
+    Idle connections are reused (most recently used first) to avoid the TLS handshake
+    of a fresh connect, checked for health when they have been idle for a while and
+    closed once they exceed the maximum idle time.
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size: int = POOL_MAX_SIZE,
+        timeout: float = POOL_TIMEOUT_SECONDS,
+        max_idle_seconds: float = POOL_MAX_IDLE_SECONDS,
+        health_check_after_seconds: float = POOL_HEALTH_CHECK_AFTER_SECONDS,
+    ):
+        assert max_size > 0, "Pool size must be greater than 0"
+
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.health_check_after_seconds = health_check_after_seconds
+
+        self._condition = threading.Condition()
+        # Idle connections as (connection, time of last check-in)
+        self._idle = deque()
+        # Number of open connections, idle and checked out
+        self._size = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._created = 0
+        self._evicted = 0
+        self._failed_health_checks = 0
+
+    def checkout(self, timeout: float = None) -> PooledConnection:
+        """
+        Checks out a connection, waiting up to `timeout` seconds if the pool is exhausted.
+
+        Returns:
+            PooledConnection: The connection, return it with close() when done.
+
+        Raises:
+            TimeoutError: If no connection became available in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        connection, last_used = None, None
+        stale = []
+
+        with self._condition:
+            if self._closed:
+                raise dbapi.ProgrammingError("Connection pool is closed")
+
+            stale = self._pop_expired_connections()
+            while True:
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve a slot, the connection is opened outside of the lock
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No HANA connection available after {timeout} seconds "
+                        f"(pool size {self.max_size})"
+                    )
+                self._condition.wait(remaining)
+
+            waited = time.monotonic() - started
+            self._checkouts += 1
+            if waited > 0.001:
+                self._waits += 1
+                self._total_wait_seconds += waited
+                self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+        for stale_connection in stale:
+            _close_quietly(stale_connection)
+
+        if connection is not None and (
+            time.monotonic() - last_used > self.health_check_after_seconds
+            and not self._is_healthy(connection)
+        ):
+            with self._condition:
+                self._failed_health_checks += 1
+            _close_quietly(connection)
+            connection = None
+
+        if connection is None:
+            try:
+                connection = self._connect()
+            except Exception:
+                self._release_slot()
+                raise
+            with self._condition:
+                self._created += 1
+
+        return PooledConnection(self, connection)
+
+    def checkin(self, connection):
+        """
+        Returns a connection to the pool. Pending work is rolled back and autocommit is
+        switched back on, so the next borrower gets a clean connection.
+        """
+        try:
+            connection.rollback()
+            connection.setautocommit(True)
+            reusable = connection.isconnected()
+        except Exception:
+            reusable = False
+
+        with self._condition:
+            if reusable and not self._closed:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+
+        _close_quietly(connection)
+        self._release_slot()
 
-    # Check if the table exists
-    check_table_query = """
-    SELECT COUNT(*)
-    FROM TABLES
-    WHERE SCHEMA_NAME = ? AND TABLE_NAME = ?
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """
+        Context manager that checks out a connection and returns it afterwards.
+        """
+        pooled_connection = self.checkout(timeout=timeout)
+        try:
+            yield pooled_connection
+        finally:
+            pooled_connection.close()
+
+    def stats(self) -> dict:
+        """
+        Returns size and wait-time metrics of the pool.
+        """
+        with self._condition:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "avg_wait_ms": (
+                    self._total_wait_seconds / self._waits * 1000 if self._waits else 0.0
+                ),
+                "max_wait_ms": self._max_wait_seconds * 1000,
+                "created": self._created,
+                "evicted": self._evicted,
+                "failed_health_checks": self._failed_health_checks,
+            }
+
+    def close(self):
+        """
+        Closes all idle connections. Connections still in use are closed on check-in.
+        """
+        with self._condition:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._condition.notify_all()
+
+        for connection in idle:
+            _close_quietly(connection)
+
+    def _pop_expired_connections(self) -> list:
+        # Must be called with the lock held. The idle queue is ordered by last use, so
+        # the expired connections are at the left end.
+        expired = []
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle_seconds:
+            expired.append(self._idle.popleft()[0])
+        self._size -= len(expired)
+        self._evicted += len(expired)
+        return expired
+
+    def _release_slot(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _is_healthy(connection) -> bool:
+        try:
+            if not connection.isconnected():
+                return False
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1 FROM DUMMY")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hana_connection_pool() -> HanaConnectionPool:
+    """
+    Returns the process wide connection pool to the HANA database, creating it on first use.
     """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HanaConnectionPool(connect=_create_connection_to_hana_db)
+        return _pool
 
-    cursor.execute(check_table_query, (schema_name, table_name))
-    return cursor.fetchone()[0] > 0
+
+@contextmanager
+def hana_connection():
+    """
+    Context manager that borrows a connection from the pool for a short operation.
+
+    Example:
+        with hana_connection() as connection:
+            cursor = connection.cursor()
+    """
+    with get_hana_connection_pool().connection() as connection:
+        yield connection
+
+
+def log_hana_pool_stats():
+    """
+    Logs the size and wait-time metrics of the HANA connection pool.
+    """
+    if _pool is None:
+        return
+    stats = _pool.stats()
+    log.info(
+        "HANA connection pool: {size}/{max_size} connections ({in_use} in use, {idle} idle), "
+        "{checkouts} checkouts, {waits} waits (avg {avg_wait_ms:.1f} ms, max {max_wait_ms:.1f} ms), "
+        "{created} created, {evicted} evicted, {failed_health_checks} failed health checks".format(
+            **stats
+        )
+    )
+
+
+def _close_hana_connection_pool():
+    if _pool is not None:
+        _pool.close()
+
+
+atexit.register(_close_hana_connection_pool)
+
+
+def check_if_exists(table_name, schema_name="DBADMIN"):
+    with hana_connection() as connection_to_hana:
+        cursor = connection_to_hana.cursor()
+
+        # Check if the table exists
+        check_table_query = """
+        SELECT COUNT(*)
+        FROM TABLES
+        WHERE SCHEMA_NAME = ? AND TABLE_NAME = ?
+        """
+
+        try:
+            cursor.execute(check_table_query, (schema_name, table_name))
+            return cursor.fetchone()[0] > 0
+        finally:
+            cursor.close()
+
+
+def table_has_rows(table_name):
+    """
+    Returns True if the table exists in the current schema and contains at least one row.
+    """
+    with hana_connection() as connection_to_hana:
+        cursor = connection_to_hana.cursor()
+        try:
+            cursor.execute(
+                "SELECT COUNT(*) FROM TABLES WHERE SCHEMA_NAME = CURRENT_SCHEMA AND TABLE_NAME = ?",
+                (table_name,),
+            )
+            if cursor.fetchone()[0] == 0:
+                return False
+            cursor.execute(f'SELECT TOP 1 1 FROM "{table_name}"')
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
 
 
 def teardown_hana_table(table_name):
     """
-    Drops the specified table in the HANA database.
+    Drops the specified table in the HANA database, together with its ingestion
+    manifest `<TABLE>_MANIFEST` if there is one.
 
     Args:
         table_name (str): The name of the table to be dropped.
@@ -37,28 +384,159 @@ def teardown_hana_table(table_name):
     Returns:
         None
     """
+    # Imported here, the manifest module depends on this one
+    from .manifest import MANIFEST_TABLE_SUFFIX
 
-    exists = check_if_exists(table_name=table_name)
-    if exists is False:
+    tables = [
+        name
+        for name in (table_name, f"{table_name}{MANIFEST_TABLE_SUFFIX}")
+        if check_if_exists(table_name=name)
+    ]
+    if not tables:
         log.success("Nothing to clean up")
         return
 
     try:
-        connection_to_hana = get_connection_to_hana_db()
-        cur = connection_to_hana.cursor()
-        log.info(f"Dropping table {table_name}")
-        cur.execute(f"DROP TABLE {table_name}")
-        cur.close()
-        log.success(f"Table {table_name} dropped successfully.")
+        with hana_connection() as connection_to_hana:
+            cur = connection_to_hana.cursor()
+            for name in tables:
+                log.info(f"Dropping table {name}")
+                cur.execute(f"DROP TABLE {name}")
+            cur.close()
+        log.success(f"Table {', '.join(tables)} dropped successfully.")
     except Exception as e:
         log.error(type(e))
         log.error(f"Error dropping table: {str(e)}")
 
 
+def vector_index_name(table_name, vector_column="VEC_VECTOR"):
+    return f"{table_name}_{vector_column}_HNSW_IDX"
+
+
+def get_vector_indexes(table_name):
+    """
+    Returns the vector indexes on the specified table.
+
+    Args:
+        table_name (str): The name of the table.
+
+    Returns:
+        list[dict]: One dict per index with the columns of the VECTOR_INDEXES system view,
+        e.g. INDEX_NAME, COLUMN_NAME, SIMILARITY_FUNCTION and the build and search configuration.
+    """
+    with hana_connection() as connection_to_hana:
+        cur = connection_to_hana.cursor()
+        try:
+            cur.execute(
+                "SELECT * FROM VECTOR_INDEXES WHERE SCHEMA_NAME = CURRENT_SCHEMA AND TABLE_NAME = ?",
+                (table_name,),
+            )
+            columns = [column[0] for column in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+        finally:
+            cur.close()
+
+
+def has_vector_index(table_name, index_name=None, vector_column="VEC_VECTOR"):
+    index_name = index_name or vector_index_name(table_name, vector_column)
+    return any(
+        index["INDEX_NAME"] == index_name for index in get_vector_indexes(table_name)
+    )
+
+
+def create_vector_index(
+    table_name,
+    vector_column="VEC_VECTOR",
+    m=HNSW_M,
+    ef_construction=HNSW_EF_CONSTRUCTION,
+    ef_search=HNSW_EF_SEARCH,
+    similarity_function="COSINE_SIMILARITY",
+    index_name=None,
+):
+    """
+    Creates a HNSW vector index on the vector column of the specified table.
+
+    The index is built from the rows already in the table, so create it after a bulk
+    load. Rows inserted later are added to the index online.
+
+    Args:
+        table_name (str): The name of the table.
+        vector_column (str, optional): The REAL_VECTOR column to index. Defaults to "VEC_VECTOR".
+        m (int, optional): The maximum number of neighbours per graph node. Defaults to HNSW_M.
+        ef_construction (int, optional): The candidate list size while building. Defaults to HNSW_EF_CONSTRUCTION.
+        ef_search (int, optional): The candidate list size while searching. Defaults to HNSW_EF_SEARCH.
+        similarity_function (str, optional): COSINE_SIMILARITY or L2DISTANCE. Defaults to "COSINE_SIMILARITY".
+        index_name (str, optional): The name of the index. Defaults to vector_index_name(table_name, vector_column).
+
+    Returns:
+        str: The name of the created index.
+    """
+    index_name = index_name or vector_index_name(table_name, vector_column)
+    build_configuration = json.dumps({"M": m, "efConstruction": ef_construction})
+    search_configuration = json.dumps({"efSearch": ef_search})
+
+    started = time.perf_counter()
+    with hana_connection() as connection_to_hana:
+        cur = connection_to_hana.cursor()
+        try:
+            log.info(
+                f"Creating HNSW index {index_name} on {table_name}.{vector_column} "
+                f"(M={m}, efConstruction={ef_construction}, efSearch={ef_search})"
+            )
+            cur.execute(
+                f'CREATE HNSW VECTOR INDEX "{index_name}" ON "{table_name}" ("{vector_column}") '
+                f"SIMILARITY FUNCTION {similarity_function} "
+                f"BUILD CONFIGURATION '{build_configuration}' "
+                f"SEARCH CONFIGURATION '{search_configuration}' ONLINE"
+            )
+        finally:
+            cur.close()
+    log.success(
+        f"HNSW index {index_name} created in {time.perf_counter() - started:.1f}s."
+    )
+    return index_name
+
+
+def drop_vector_index(table_name, vector_column="VEC_VECTOR", index_name=None):
+    """
+    Drops the vector index of the specified table if it exists.
+
+    Returns:
+        bool: True if an index was dropped.
+    """
+    index_name = index_name or vector_index_name(table_name, vector_column)
+    if not has_vector_index(table_name, index_name=index_name):
+        return False
+
+    with hana_connection() as connection_to_hana:
+        cur = connection_to_hana.cursor()
+        try:
+            log.info(f"Dropping vector index {index_name}")
+            cur.execute(f'DROP INDEX "{index_name}"')
+        finally:
+            cur.close()
+    return True
+
+
+def rebuild_vector_index(table_name, vector_column="VEC_VECTOR", index_name=None, **parameters):
+    """
+    Drops and recreates the HNSW vector index of the specified table, e.g. after a
+    bulk load or to apply new build parameters. Accepts the parameters of create_vector_index.
+    """
+    drop_vector_index(table_name, vector_column=vector_column, index_name=index_name)
+    return create_vector_index(
+        table_name, vector_column=vector_column, index_name=index_name, **parameters
+    )
+
+
 # Function to get a connection to the HANA DB
 def get_connection_to_hana_db():
     """
-    Establishes a connection to the HANA database.
+    Checks out a connection to the HANA database from the connection pool.
+
+    The connection is meant for long-lived users such as a HanaDB vector store. Call
+    close() on it to return it to the pool; it is returned automatically once it is
+    garbage collected. For short operations prefer the `hana_connection()` context manager.
 
     Returns:
         conn: A connection object representing the connection to the HANA database.
@@ -67,28 +545,31 @@ def get_connection_to_hana_db():
         Exception: If there is an error connecting to the HANA database.
     """
     try:
-        assert_env(
-            [
-                "HANA_DB_ADDRESS",
-                "HANA_DB_PORT",
-                "HANA_DB_USER",
-                "HANA_DB_PASSWORD",
-            ]
-        )
-        conn = dbapi.connect(
-            address=os.environ.get("HANA_DB_ADDRESS"),
-            port=os.environ.get("HANA_DB_PORT"),
-            user=os.environ.get("HANA_DB_USER"),
-            password=os.environ.get("HANA_DB_PASSWORD"),
-            encrypt=True,
-            sslValidateCertificate=False,
-        )
-        return conn
+        return get_hana_connection_pool().checkout()
     except Exception as e:
         log.error(f"Error connecting to HANA DB: {str(e)}")
         sys.exit()
 
 
+def _create_connection_to_hana_db():
+    assert_env(
+        [
+            "HANA_DB_ADDRESS",
+            "HANA_DB_PORT",
+            "HANA_DB_USER",
+            "HANA_DB_PASSWORD",
+        ]
+    )
+    return dbapi.connect(
+        address=os.environ.get("HANA_DB_ADDRESS"),
+        port=os.environ.get("HANA_DB_PORT"),
+        user=os.environ.get("HANA_DB_USER"),
+        password=os.environ.get("HANA_DB_PASSWORD"),
+        encrypt=True,
+        sslValidateCertificate=False,
+    )
+
+
 def get_connection_string():
     """
     Returns the connection string for connecting to a HANA database.
@@ -122,18 +603,19 @@ def has_embeddings(table_name, verbose=True):
     try:
         assert table_name, "Table name must be provided"
 
-        connection_to_hana = get_connection_to_hana_db()
-        cur = connection_to_hana.cursor()
-        cur.execute(
-            f"SELECT VEC_TEXT, VEC_META, TO_NVARCHAR(VEC_VECTOR) FROM {table_name} LIMIT 1"
-        )
-        rows = cur.fetchone()
+        with hana_connection() as connection_to_hana:
+            cur = connection_to_hana.cursor()
+            cur.execute(
+                f"SELECT VEC_TEXT, VEC_META, TO_NVARCHAR(VEC_VECTOR) FROM {table_name} LIMIT 1"
+            )
+            rows = cur.fetchone()
+            cur.close()
+
         if verbose:
             print(
                 f"Preview of embeddings in table {table_name}: \n\nText: {rows[0][:300]},\nMetadata:{rows[1][:300]},\nVector: {rows[2][:100]}\n"
             )
 
-        cur.close()
         return True
     except Exception as e:
         log.error(f"Error executing query: {str(e)}")
@@ -0,0 +1,209 @@
+import csv
+import os
+import time
+from dataclasses import dataclass
+from itertools import chain, islice
+from logging import getLogger
+from typing import Iterable, Iterator, Optional, Union
+
+from .hana import hana_connection
+
+log = getLogger(__name__)
+
+# Number of rows bound to one `executemany` call
+BULK_LOAD_BATCH_SIZE = 10_000
+# Number of rows the column types are inferred from
+SCHEMA_SAMPLE_SIZE = 1_000
+# Longest NVARCHAR column created by the schema inference
+NVARCHAR_MAX_LENGTH = 5000
+
+_INTEGER_MIN, _INTEGER_MAX = -(2**31), 2**31 - 1
+
+
+@dataclass
+class BulkLoadStats:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.rows} rows in {self.batches} batches, {self.seconds:.1f}s "
+            f"({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+def _parse_csv_value(value: str):
+    # CSV values are strings, the schema inference and the array binding need the types
+    if value == "":
+        return None
+    for parse in (int, float):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return value
+
+
+def read_csv_rows(path: str, **csv_options) -> Iterator[dict]:
+    """
+    Reads a CSV file with a header row as dicts, converting numbers to int and float
+    and empty values to None.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, **csv_options):
+            yield {key: _parse_csv_value(value) for key, value in row.items()}
+
+
+def read_parquet_rows(path: str, batch_size: int = BULK_LOAD_BATCH_SIZE) -> Iterator[dict]:
+    """
+    Reads a Parquet file as dicts, one record batch at a time. Requires pyarrow.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet files requires pyarrow: pip install pyarrow")
+
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from record_batch.to_pylist()
+
+
+def read_rows(source: Union[str, Iterable[dict]]) -> Iterator[dict]:
+    """
+    Returns the rows of a CSV file, a Parquet file or an iterable of dicts as dicts.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        return iter(source)
+
+    extension = os.path.splitext(str(source))[1].lower()
+    if extension == ".csv":
+        return read_csv_rows(source)
+    if extension in (".parquet", ".pq"):
+        return read_parquet_rows(source)
+    raise ValueError(f"Unsupported file type {extension}, use CSV or Parquet")
+
+
+def _sql_type(values: list) -> str:
+    values = [value for value in values if value is not None]
+    if values and all(isinstance(value, bool) for value in values):
+        return "BOOLEAN"
+    if values and all(
+        isinstance(value, int) and not isinstance(value, bool) for value in values
+    ):
+        if all(_INTEGER_MIN <= value <= _INTEGER_MAX for value in values):
+            return "INTEGER"
+        return "BIGINT"
+    if values and all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in values
+    ):
+        return "DOUBLE"
+
+    # Leave room for longer values after the sample, rounded up to a power of two
+    longest = max((len(str(value)) for value in values), default=0)
+    length = 16
+    while length < 2 * longest:
+        length *= 2
+    return f"NVARCHAR({min(length, NVARCHAR_MAX_LENGTH)})"
+
+
+def infer_schema(rows: list[dict]) -> dict[str, str]:
+    """
+    Infers the HANA column types from sample rows.
+
+    Columns are named after the upper-cased keys of the rows. Integers become INTEGER or
+    BIGINT, mixed numbers DOUBLE, booleans BOOLEAN and everything else NVARCHAR with
+    twice the longest sampled length. Pass a schema to `bulk_load` if the sample is not
+    representative.
+
+    Returns:
+        dict[str, str]: The SQL type per column name, in the order of the keys.
+    """
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return {key.upper(): _sql_type([row.get(key) for row in rows]) for key in keys}
+
+
+def create_table(cursor, table_name: str, schema: dict[str, str], primary_key=None):
+    columns = [f'"{name}" {sql_type}' for name, sql_type in schema.items()]
+    if primary_key:
+        keys = [primary_key] if isinstance(primary_key, str) else list(primary_key)
+        columns.append("PRIMARY KEY (" + ", ".join(f'"{key}"' for key in keys) + ")")
+    cursor.execute(f'CREATE TABLE "{table_name}" ({", ".join(columns)})')
+
+
+def bulk_load(
+    table_name: str,
+    source: Union[str, Iterable[dict]],
+    schema: Optional[dict[str, str]] = None,
+    primary_key: Optional[Union[str, list[str]]] = None,
+    create: bool = True,
+    batch_size: int = BULK_LOAD_BATCH_SIZE,
+) -> BulkLoadStats:
+    """
+    Loads rows from a CSV file, a Parquet file or an iterable of dicts into a HANA table.
+
+    The rows are inserted with array-bound `executemany` calls of `batch_size` rows, all
+    in one transaction: either all rows are loaded or, on error, none. Only one batch is
+    held in memory, besides the sample for the schema inference.
+
+    Args:
+        table_name (str): The name of the table.
+        source (str | Iterable[dict]): The path of a .csv or .parquet file, or the rows.
+        schema (dict[str, str], optional): The SQL type per column, e.g.
+            {"CITY_NAME": "NVARCHAR(64)"}. The columns are matched to the keys of the
+            rows case-insensitively. Inferred from the first rows if not given.
+        primary_key (str | list[str], optional): The primary key column(s) of a created table.
+        create (bool, optional): Whether to create the table. Defaults to True.
+        batch_size (int, optional): The number of rows per round trip. Defaults to BULK_LOAD_BATCH_SIZE.
+
+    Returns:
+        BulkLoadStats: The number of rows and batches and the load rate.
+    """
+    assert batch_size > 0, "Batch size must be greater than 0"
+
+    rows = read_rows(source)
+    sample = list(islice(rows, SCHEMA_SAMPLE_SIZE))
+    if not sample:
+        raise ValueError(f"No rows to load into {table_name}")
+    rows = chain(sample, rows)
+
+    schema = schema or infer_schema(sample)
+    keys_by_column = {key.upper(): key for row in sample for key in row}
+    missing = [column for column in schema if column.upper() not in keys_by_column]
+    if missing:
+        raise ValueError(f"The rows have no values for the columns {missing}")
+    keys = [keys_by_column[column.upper()] for column in schema]
+
+    columns = ", ".join(f'"{column}"' for column in schema)
+    placeholders = ", ".join("?" for _ in schema)
+    sql = f'INSERT INTO "{table_name}" ({columns}) VALUES ({placeholders})'
+
+    stats = BulkLoadStats()
+    started = time.perf_counter()
+    with hana_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            if create:
+                create_table(cursor, table_name, schema, primary_key)
+            connection.setautocommit(False)
+            while batch := [
+                tuple(row.get(key) for key in keys) for row in islice(rows, batch_size)
+            ]:
+                cursor.executemany(sql, batch)
+                stats.rows += len(batch)
+                stats.batches += 1
+                log.info(f"Inserted batch {stats.batches} ({stats.rows} rows)")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+    stats.seconds = time.perf_counter() - started
+
+    log.success(f"Bulk loaded into {table_name}: {stats}")
+    return stats
@@ -0,0 +1,187 @@
+import json
+import time
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from logging import getLogger
+from typing import Callable, Iterable, Optional
+
+from langchain.schema import Document
+from langchain_community.vectorstores.hanavector import HanaDB
+
+log = getLogger(__name__)
+
+# Number of document chunks embedded and inserted per round trip
+INGEST_BATCH_SIZE = 256
+
+
+@dataclass
+class WriteStats:
+    rows: int = 0
+    batches: int = 0
+    embedding_seconds: float = 0.0
+    insert_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.rows} rows in {self.batches} batches, {self.total_seconds:.1f}s total "
+            f"({self.rows_per_second:.1f} rows/s, embedding {self.embedding_seconds:.1f}s, "
+            f"insert {self.insert_seconds:.1f}s)"
+        )
+
+
+class HanaVectorWriter:
+    """
+    Writes document chunks into the table of a HanaDB vector store in batches.
+
+    Each batch is embedded with the embedding model of the vector store and inserted
+    with a single array-bound `executemany` call, followed by a commit. The embedding of
+    the next batch runs in a background thread while the current batch is inserted, and
+    only two batches are held in memory at any time.
+    """
+
+    def __init__(self, db: HanaDB, batch_size: int = INGEST_BATCH_SIZE):
+        assert batch_size > 0, "Batch size must be greater than 0"
+
+        self.db = db
+        self.batch_size = batch_size
+        self.stats = WriteStats()
+
+    def write(
+        self,
+        documents: Iterable[Document],
+        on_batch: Optional[Callable[[object, list[Document]], None]] = None,
+    ) -> WriteStats:
+        """
+        Embeds and inserts the documents batch by batch.
+
+        Args:
+            documents (Iterable[Document]): The document chunks to write.
+            on_batch (callable, optional): Called with the cursor and the documents of
+                each batch right before they are inserted, to change further rows (e.g.
+                checkpoints) in the same transaction.
+
+        Returns:
+            WriteStats: Row counts and timings of this write.
+        """
+        started = time.perf_counter()
+        connection = self.db.connection
+        autocommit = connection.getautocommit()
+        connection.setautocommit(False)
+        cursor = connection.cursor()
+
+        batches = self._batches(documents)
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                batch = next(batches, None)
+                pending = executor.submit(self.embed_batch, batch) if batch else None
+
+                while pending is not None:
+                    embeddings = pending.result()
+                    current_batch = batch
+
+                    # Start embedding the next batch while the current one is written
+                    batch = next(batches, None)
+                    pending = executor.submit(self.embed_batch, batch) if batch else None
+
+                    if on_batch:
+                        on_batch(cursor, current_batch)
+                    self.insert_batch(cursor, current_batch, embeddings)
+                    connection.commit()
+                    log.info(
+                        f"Committed batch {self.stats.batches} ({self.stats.rows} rows written)"
+                    )
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            connection.setautocommit(autocommit)
+            self.stats.total_seconds += time.perf_counter() - started
+
+        return self.stats
+
+    def embed_batch(self, documents: list[Document]) -> list[list[float]]:
+        """
+        Embeds the page contents of a batch of documents.
+        """
+        started = time.perf_counter()
+        embeddings = self.db.embedding.embed_documents(
+            [document.page_content for document in documents]
+        )
+        self.stats.embedding_seconds += time.perf_counter() - started
+        return embeddings
+
+    def insert_batch(self, cursor, documents: list[Document], embeddings: list[list[float]]):
+        """
+        Inserts a batch of documents and their embeddings with one `executemany` call.
+        The caller is responsible for committing.
+        """
+        started = time.perf_counter()
+        cursor.executemany(
+            self._insert_statement(),
+            [
+                self._row(document, embedding)
+                for document, embedding in zip(documents, embeddings)
+            ],
+        )
+        self.stats.insert_seconds += time.perf_counter() - started
+        self.stats.rows += len(documents)
+        self.stats.batches += 1
+
+    def _batches(self, documents: Iterable[Document]):
+        iterator = iter(documents)
+        while batch := list(islice(iterator, self.batch_size)):
+            yield batch
+
+    def _row(self, document: Document, embedding: list[float]) -> tuple:
+        metadata, special_metadata = self.db._split_off_special_metadata(
+            document.metadata
+        )
+        return (
+            document.page_content,
+            json.dumps(HanaDB._sanitize_metadata_keys(metadata)),
+            f"[{','.join(map(str, embedding))}]",
+            *special_metadata,
+        )
+
+    def _insert_statement(self) -> str:
+        db = self.db
+        specific_columns = "".join(
+            f', "{column}"' for column in db.specific_metadata_columns
+        )
+        return (
+            f'INSERT INTO "{db.table_name}" ("{db.content_column}", '
+            f'"{db.metadata_column}", "{db.vector_column}"{specific_columns}) '
+            f"VALUES (?, ?, TO_REAL_VECTOR (?)"
+            f"{', ?' * len(db.specific_metadata_columns)})"
+        )
+
+
+def write_documents(
+    db: HanaDB,
+    documents: Iterable[Document],
+    batch_size: int = INGEST_BATCH_SIZE,
+    on_batch: Optional[Callable[[object, list[Document]], None]] = None,
+) -> WriteStats:
+    """
+    Embeds and writes document chunks to the table of the HanaDB vector store in batches.
+
+    Args:
+        db (HanaDB): The vector store to write to.
+        documents (Iterable[Document]): The document chunks to write.
+        batch_size (int, optional): The number of chunks per batch. Defaults to INGEST_BATCH_SIZE.
+        on_batch (callable, optional): Called before each batch is committed, see
+            HanaVectorWriter.write.
+
+    Returns:
+        WriteStats: Row counts and timings of the write.
+    """
+    stats = HanaVectorWriter(db, batch_size=batch_size).write(documents, on_batch=on_batch)
+    log.info(f"Wrote {stats}")
+    return stats
@@ -1,5 +1,17 @@
+import hashlib
+import json
+import os
 import requests
 import io
+import tempfile
+from logging import getLogger
+from urllib.parse import urlparse
+
+from .kvstore import CACHE_DIR
+
+log = getLogger(__name__)
+
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "downloads")
 
 
 def fetch_file(url):
@@ -18,3 +30,71 @@ def fetch_file(url):
     """
     response = requests.get(url, timeout=20)
     return response.content
+
+
+def download_cached(url: str, cache_dir: str = HTTP_CACHE_DIR, timeout: int = 60):
+    """
+    Downloads a file into a local cache and revalidates it on later calls.
+
+    The ETag and Last-Modified headers of the response are stored next to the file and
+    sent as If-None-Match / If-Modified-Since, so an unchanged file is answered with 304
+    and not downloaded again. If the server cannot be reached, the cached copy is used.
+
+    Args:
+        url (str): The URL of the file.
+        cache_dir (str, optional): The folder of the cache. Defaults to HTTP_CACHE_DIR.
+        timeout (int, optional): The timeout of the request in seconds. Defaults to 60.
+
+    Returns:
+        tuple[str, bool]: The path of the cached file and whether its content changed
+            since the last call, i.e. whether it was (re)downloaded.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    extension = os.path.splitext(urlparse(url).path)[1]
+    path = os.path.join(cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + extension)
+    validators_path = path + ".json"
+
+    headers = {}
+    if os.path.exists(path) and os.path.exists(validators_path):
+        with open(validators_path) as f:
+            validators = json.load(f)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout, stream=True)
+        if response.status_code == 304:
+            response.close()
+            return path, False
+        response.raise_for_status()
+
+        # Write to a temporary file of its own first, so an interrupted download never
+        # replaces a complete cached copy and concurrent downloads do not mix
+        with response, tempfile.NamedTemporaryFile(
+            dir=cache_dir, prefix=os.path.basename(path) + ".", suffix=".part", delete=False
+        ) as f:
+            try:
+                for block in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(block)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, path)
+        with open(validators_path, "w") as f:
+            json.dump(
+                {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                },
+                f,
+            )
+        return path, True
+    except requests.exceptions.RequestException as e:
+        if headers:
+            log.warning(f"Could not revalidate {url}, using the cached copy: {str(e)}")
+            return path, False
+        raise
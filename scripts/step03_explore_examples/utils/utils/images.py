@@ -0,0 +1,141 @@
+import base64
+import io
+import math
+import os
+from dataclasses import dataclass
+from logging import getLogger
+
+from PIL import Image, ImageOps
+
+log = getLogger(__name__)
+
+# Longest edge of the images sent to the vision models. Larger images are downscaled by
+# the models anyway (Claude to 1568 px on the long edge, GPT-4o to 768 px on the short
+# edge), so uploading them in full size only costs bandwidth and tokens.
+IMAGE_MAX_EDGE = int(os.environ.get("IMAGE_MAX_EDGE", 1568))
+# "JPEG" or "WEBP", both are accepted by the OpenAI and the Anthropic vision models
+IMAGE_FORMAT = os.environ.get("IMAGE_FORMAT", "JPEG")
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", 85))
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png", "GIF": "image/gif"}
+
+
+def sniff_mime_type(content: bytes) -> str:
+    """
+    Returns the MIME type of PNG, JPEG, GIF and WebP images from their magic bytes.
+    """
+    if content.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if content.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if content.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return "image/webp"
+    raise ValueError("Unsupported image format, expected PNG, JPEG, GIF or WebP")
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimates the input tokens of an image with the tiling of the OpenAI vision models
+    (high detail): fit into 2048 x 2048, scale the short edge down to 768, then 170
+    tokens per 512 px tile plus 85.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+@dataclass
+class PreparedImage:
+    data: str
+    mime_type: str
+    width: int = 0
+    height: int = 0
+    original_bytes: int = 0
+    bytes: int = 0
+    original_tokens: int = 0
+    tokens: int = 0
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.data}"
+
+    def __str__(self):
+        return (
+            f"{self.original_bytes / 1024:.0f} KB -> {self.bytes / 1024:.0f} KB, "
+            f"~{self.original_tokens} -> ~{self.tokens} tokens ({self.mime_type})"
+        )
+
+
+def prepare_image(
+    content: bytes,
+    max_edge: int = IMAGE_MAX_EDGE,
+    image_format: str = IMAGE_FORMAT,
+    quality: int = IMAGE_QUALITY,
+    name: str = "image",
+) -> PreparedImage:
+    """
+    Prepares an image for a vision model: downscales it to `max_edge` on its longest
+    edge, recompresses it and drops its metadata (EXIF, ICC profile, comments). An
+    original without metadata is kept if it is already small enough and the recompressed
+    image would not be smaller. The savings are logged.
+
+    Args:
+        content (bytes): The image file content (PNG, JPEG, GIF or WebP).
+        max_edge (int, optional): The maximum width and height. Defaults to IMAGE_MAX_EDGE.
+        image_format (str, optional): "JPEG" or "WEBP". Defaults to IMAGE_FORMAT.
+        quality (int, optional): The compression quality, 1-100. Defaults to IMAGE_QUALITY.
+        name (str, optional): The name of the image in the log.
+
+    Returns:
+        PreparedImage: The base64 encoded image, its MIME type and the sizes before and after.
+    """
+    original_mime_type = sniff_mime_type(content)
+
+    with Image.open(io.BytesIO(content)) as image:
+        original_size = image.size
+        has_metadata = any(
+            key in image.info for key in ("exif", "icc_profile", "xmp", "comment")
+        )
+        # Apply the EXIF orientation before the EXIF data is dropped
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        if has_alpha and image_format == "JPEG":
+            # JPEG has no transparency, put transparent images on a white background
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        elif has_alpha:
+            image = image.convert("RGBA")
+        elif image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+        size = image.size
+
+    recompressed = buffer.getvalue()
+    if size == original_size and not has_metadata and len(recompressed) >= len(content):
+        data, mime_type = content, original_mime_type
+    else:
+        data, mime_type = recompressed, _MIME_TYPES[image_format]
+
+    prepared = PreparedImage(
+        data=base64.b64encode(data).decode("utf-8"),
+        mime_type=mime_type,
+        width=size[0],
+        height=size[1],
+        original_bytes=len(content),
+        bytes=len(data),
+        original_tokens=estimate_image_tokens(*original_size),
+        tokens=estimate_image_tokens(*size),
+    )
+    log.info(
+        f"Prepared {name} ({original_size[0]}x{original_size[1]} -> "
+        f"{size[0]}x{size[1]}): {prepared}"
+    )
+    return prepared
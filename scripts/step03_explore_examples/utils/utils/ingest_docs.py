@@ -1,57 +1,178 @@
 from logging import getLogger
 
 from langchain_community.vectorstores.hanavector import HanaDB
-from langchain_community.document_loaders import GitLoader
 from gen_ai_hub.proxy.langchain.openai import OpenAIEmbeddings
 from gen_ai_hub.proxy.core.proxy_clients import get_proxy_client
 
 from utils.rag import split_docs_into_chunks
+from utils.dedup import deduplicate_chunks
+from utils.manifest import RESUME_HINT, sync_documents
+from utils.pipeline import stream_documents
+from utils.local_vectorstore import get_local_vector_store
+from utils.git_loader import (
+    ShallowGitLoader,
+    ingestion_fingerprint,
+    record_ingested_commit,
+)
+from utils.embeddings import (
+    CachedEmbeddings,
+    ConcurrentEmbeddings,
+    log_embedding_cache_stats,
+    log_embedding_request_stats,
+)
 from utils.hana import (
-    get_connection_to_hana_db,
+    create_vector_index,
+    hana_connection,
+    has_vector_index,
+    log_hana_pool_stats,
+    rebuild_vector_index,
+    table_has_rows,
 )
 
 log = getLogger(__name__)
 
-def fetch_terraform_docs():
+TERRAFORM_DOCS_REPO_PATH = "./gen/docs/"
+
+def fetch_terraform_docs(table_name=None, lazy=False, fingerprint=None):
+    """
+    Loads the Terraform provider docs from a shallow, sparse clone of the repository.
+    With a table name, None is returned when the head commit was already ingested into
+    the table with the same ingestion parameters (`fingerprint`, see
+    `ingestion_fingerprint`) and the table still has rows. With `lazy`, an iterator is
+    returned that reads the documents while they are consumed.
+
+    Raises:
+        Exception: If the documents could not be loaded.
+    """
     try:
         log.info("Getting the documents from the GitHub repository")
-        loader = GitLoader(
+        loader = ShallowGitLoader(
             clone_url="https://github.com/SAP/terraform-provider-btp",
-            repo_path="./gen/docs/",
+            repo_path=TERRAFORM_DOCS_REPO_PATH,
+            sparse_paths=["docs"],
             file_filter=lambda file_path: file_path.startswith("./gen/docs/docs")
             and file_path.endswith(".md"),
             branch="main",
         )
+        if (
+            table_name
+            and loader.is_ingested(table_name, fingerprint)
+            and table_has_rows(table_name)
+        ):
+            log.success(
+                f"Commit {loader.commit_sha[:8]} is already ingested into {table_name}, nothing to do."
+            )
+            return None
+        if lazy:
+            return loader.lazy_load()
         documents = loader.load()
         log.info("Terraform documents loaded successfully.")
         return documents
     except Exception as e:
         log.error(f"Error occurred while loading documents: {str(e)}")
+        raise
+
+
+def ingest_docs(
+    documents,
+    table_name,
+    embeddings_model_name,
+    build_vector_index=False,
+    backend="hana",
+    repo_path=None,
+    chunk_size=1000,
+    chunk_overlap=100,
+    chunk_length="characters",
+    dedup_threshold=None,
+):
+    """
+    Splits, embeds and writes the documents into the table, None documents mean that
+    the table is up to date. After a successful ingestion into HANA, the commit checked
+    out at `repo_path` is recorded with the fingerprint of the ingestion parameters.
+    """
+    if documents is None:
+        return
 
-def ingest_docs(documents, table_name, embeddings_model_name):   
     try:
         log.info(f"Start ingesting data in {table_name}")
         assert table_name, "Table name is required"
         assert embeddings_model_name, "EMBEDDINGS_MODEL_NAME is required"
-        connection_to_hana = get_connection_to_hana_db()
         proxy_client = get_proxy_client("gen-ai-hub")       
         embeddings = OpenAIEmbeddings(
             proxy_model_name=embeddings_model_name, proxy_client=proxy_client
         )
-        cur = connection_to_hana.cursor()
-        chunks = split_docs_into_chunks(documents=documents)
-
-        db = HanaDB(
-            embedding=embeddings, connection=connection_to_hana, table_name=table_name
+        # Send the chunks that are not cached in concurrent, throttled requests
+        embeddings = CachedEmbeddings(
+            ConcurrentEmbeddings(embeddings, model_name=embeddings_model_name),
+            model_name=embeddings_model_name,
         )
-        log.info(f"Deleting existing document chunks from the table {table_name}")
-        db.delete(filter={})
-        log.success("Document chunks deleted successfully!")
 
-        log.info(f"Add document chunks to the table {table_name}")
-        db.add_documents(chunks)
-        log.success("Document chunks added successfully.")
+        chunks = None
+        if backend == "local" or dedup_threshold:
+            # Deduplication compares every chunk with all others, so it needs all chunks
+            chunks = split_docs_into_chunks(
+                documents=list(documents),
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length=chunk_length,
+                model_name=embeddings_model_name,
+            )
+            if dedup_threshold:
+                chunks = deduplicate_chunks(chunks, threshold=dedup_threshold)
+
+        if backend == "local":
+            db = get_local_vector_store(table_name, embeddings)
+            sync_documents(db, chunks, embeddings_model_name)
+            log_embedding_cache_stats(embeddings)
+            log_embedding_request_stats(embeddings)
+            return
+
+        with hana_connection() as connection_to_hana:
+            db = HanaDB(
+                embedding=embeddings, connection=connection_to_hana, table_name=table_name
+            )
+            log.info(f"Synchronize document chunks with the table {table_name}")
+            if chunks is not None:
+                report = sync_documents(db, chunks, embeddings_model_name)
+            else:
+                # Split, embed and write the documents while they are read
+                report = stream_documents(
+                    db,
+                    documents,
+                    embeddings_model_name,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    chunk_length=chunk_length,
+                )
+            log.success("Document chunks synchronized successfully.")
+        if repo_path:
+            fingerprint = ingestion_fingerprint(
+                embeddings_model_name,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                chunk_length=chunk_length,
+                dedup_threshold=dedup_threshold,
+            )
+            record_ingested_commit(table_name, repo_path, fingerprint=fingerprint)
 
-        cur.close()
+        if build_vector_index:
+            total_chunks = report.skipped + report.added + report.updated
+            build_vector_index_after_load(table_name, report, total_chunks=total_chunks)
+
+        log_embedding_cache_stats(embeddings)
+        log_embedding_request_stats(embeddings)
+        log_hana_pool_stats()
     except Exception as e:
-        log.error(f"Error occurred during ingestion: {str(e)}")
\ No newline at end of file
+        log.error(f"Error occurred during ingestion: {str(e)}. {RESUME_HINT}")
+
+
+def build_vector_index_after_load(table_name, report, total_chunks):
+    """
+    Creates the HNSW index of the table if it is missing. After a bulk load that replaced
+    more than half of the chunks the index is rebuilt, smaller deltas are maintained by
+    HANA online.
+    """
+    if not has_vector_index(table_name):
+        create_vector_index(table_name)
+    elif report.added + report.updated + report.removed > total_chunks // 2:
+        rebuild_vector_index(table_name)
\ No newline at end of file
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+import time
+from logging import getLogger
+from pathlib import Path
+
+log = getLogger(__name__)
+
+# Folder for the local caches of the examples, relative to the working directory
+CACHE_DIR = os.environ.get("GENAI_CACHE_DIR", "./gen/cache")
+
+
+class SqliteKVStore:
+    """
+    A persistent key-value store for bytes on top of a local sqlite database.
+
+    When `max_bytes` is set, the least recently used entries are evicted as soon as the
+    total size of the stored values exceeds the limit. The store can be shared between
+    threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int = None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self._connection.commit()
+        self._size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def get(self, key: str) -> bytes:
+        return self.mget([key])[0]
+
+    def mget(self, keys: list[str]) -> list:
+        """
+        Returns the values for the given keys, None for keys that are not stored.
+        """
+        if not keys:
+            return []
+
+        found = {}
+        with self._lock:
+            # Stay below the sqlite limit of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(
+                    self._connection.execute(
+                        f"SELECT key, value FROM entries WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._connection.commit()
+
+        return [found.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes):
+        self.mset([(key, value)])
+
+    def mset(self, items: list[tuple[str, bytes]]):
+        if not items:
+            return
+
+        # The last value wins for keys that are given more than once
+        items = list(dict(items).items())
+        now = time.time()
+        with self._lock:
+            self._delete([key for key, _ in items])
+            self._connection.executemany(
+                "INSERT INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                [(key, value, len(value), now) for key, value in items],
+            )
+            self._size += sum(len(value) for _, value in items)
+            self._evict()
+            self._connection.commit()
+
+    def delete(self, keys: list[str]):
+        with self._lock:
+            self._delete(keys)
+            self._connection.commit()
+
+    def _delete(self, keys: list[str]):
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            freed = self._connection.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE key IN ({placeholders})",
+                chunk,
+            ).fetchone()[0]
+            self._connection.execute(
+                f"DELETE FROM entries WHERE key IN ({placeholders})", chunk
+            )
+            self._size -= freed
+
+    def yield_keys(self, prefix: str = None):
+        with self._lock:
+            if prefix:
+                rows = self._connection.execute(
+                    "SELECT key FROM entries WHERE key >= ? AND key < ?",
+                    (prefix, prefix + "\uffff"),
+                ).fetchall()
+            else:
+                rows = self._connection.execute("SELECT key FROM entries").fetchall()
+        for row in rows:
+            yield row[0]
+
+    def size_bytes(self) -> int:
+        return self._size
+
+    def _evict(self):
+        if self.max_bytes is None or self._size <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the limit, so not every write triggers an eviction
+        target = self.max_bytes * 0.9
+        evicted = 0
+        rows = self._connection.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall()
+        victims = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            victims.append((key,))
+            self._size -= size
+            evicted += 1
+        self._connection.executemany("DELETE FROM entries WHERE key = ?", victims)
+        log.debug(f"Evicted {evicted} entries from {self.path}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
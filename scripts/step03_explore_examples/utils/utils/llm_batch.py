@@ -0,0 +1,141 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging import getLogger
+from typing import Optional
+
+from .embeddings import AdaptiveConcurrencyLimiter
+from .kvstore import CACHE_DIR, SqliteKVStore
+from .retry import is_retryable, status_code
+
+log = getLogger(__name__)
+
+# Chat completion requests sent to the AI Core proxy in parallel
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+LLM_MAX_RETRIES = 6
+
+LLM_RESPONSE_CACHE_PATH = os.path.join(CACHE_DIR, "llm_responses.sqlite")
+LLM_RESPONSE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+_response_store = None
+_response_store_lock = threading.Lock()
+
+
+def get_response_store() -> SqliteKVStore:
+    """
+    Returns the shared on-disk store for cached LLM responses.
+    """
+    global _response_store
+    with _response_store_lock:
+        if _response_store is None:
+            _response_store = SqliteKVStore(
+                LLM_RESPONSE_CACHE_PATH, max_bytes=LLM_RESPONSE_CACHE_MAX_BYTES
+            )
+        return _response_store
+
+
+def _invoke_with_retries(llm, prompt, limiter: AdaptiveConcurrencyLimiter, max_retries: int):
+    for attempt in range(max_retries + 1):
+        try:
+            with limiter:
+                response = llm.invoke(prompt)
+            limiter.on_success()
+            return response.content
+        except Exception as e:
+            if not is_retryable(e) or attempt == max_retries:
+                raise
+            limiter.on_throttled()
+            delay = min(60, 2**attempt) * (0.5 + random.random())
+            log.warning(
+                f"LLM request failed with status {status_code(e)}, "
+                f"retrying in {delay:.1f}s ({attempt + 1}/{max_retries})"
+            )
+            time.sleep(delay)
+
+
+def batch_invoke(
+    llm,
+    prompts: list,
+    max_concurrency: int = LLM_MAX_CONCURRENCY,
+    max_retries: int = LLM_MAX_RETRIES,
+    description: str = "prompts",
+    cache_keys: Optional[list[str]] = None,
+    store: Optional[SqliteKVStore] = None,
+) -> list[str]:
+    """
+    Invokes the LLM for many prompts concurrently and returns the response contents in
+    the order of the prompts.
+
+    The requests run on a thread pool. Like the embedding requests, the number of
+    requests in flight adapts to the AI Core proxy, and each prompt that is throttled
+    (429) or fails (5xx) is retried on its own with exponential backoff. The progress
+    and the throughput are logged as the responses arrive.
+
+    With `cache_keys`, the responses are cached on disk and only the prompts without a
+    cached response are sent. A key must identify everything the response depends on,
+    e.g. the model, the prompt template and the content the prompt is built from. Each
+    response is stored as soon as it arrives, so an interrupted run keeps its progress.
+
+    Args:
+        llm: The chat model, e.g. ChatOpenAI.
+        prompts (list): The inputs of `llm.invoke`, e.g. lists of messages.
+        max_concurrency (int, optional): The maximum number of requests in flight.
+            Defaults to LLM_MAX_CONCURRENCY.
+        max_retries (int, optional): The retries per prompt. Defaults to LLM_MAX_RETRIES.
+        description (str, optional): What the prompts are, for the progress log.
+        cache_keys (list[str], optional): The cache key of each prompt. Defaults to no caching.
+        store (SqliteKVStore, optional): The cache. Defaults to get_response_store().
+
+    Returns:
+        list[str]: The content of the response to each prompt.
+    """
+    assert max_concurrency > 0, "Concurrency must be greater than 0"
+
+    results = [None] * len(prompts)
+    pending = list(range(len(prompts)))
+    if cache_keys is not None:
+        assert len(cache_keys) == len(prompts), "Expected one cache key per prompt"
+        store = store or get_response_store()
+        for index, value in enumerate(store.mget(cache_keys)):
+            if value is not None:
+                results[index] = value.decode("utf-8")
+        pending = [index for index in pending if results[index] is None]
+        log.info(
+            f"{len(prompts) - len(pending)} of {len(prompts)} {description} answered from the cache"
+        )
+    if not pending:
+        return results
+
+    limiter = AdaptiveConcurrencyLimiter(max_concurrency, name="LLM")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm") as executor:
+        futures = {
+            executor.submit(
+                _invoke_with_retries, llm, prompts[index], limiter, max_retries
+            ): index
+            for index in pending
+        }
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                results[index] = future.result()
+                if cache_keys is not None:
+                    store.set(cache_keys[index], results[index].encode("utf-8"))
+                elapsed = time.perf_counter() - started
+                log.info(
+                    f"Processed {done}/{len(pending)} {description} ({done / elapsed:.2f}/s)"
+                )
+        except BaseException:
+            # Do not start the remaining prompts once one of them failed for good
+            for future in futures:
+                future.cancel()
+            raise
+
+    elapsed = time.perf_counter() - started
+    log.success(
+        f"Processed {len(pending)} {description} in {elapsed:.1f}s "
+        f"({len(pending) / elapsed:.2f}/s, up to {max_concurrency} in parallel)"
+    )
+    return results
@@ -0,0 +1,364 @@
+import re
+import threading
+import uuid
+from logging import getLogger
+from typing import Any, Callable, Iterable, Optional
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.vectorstores.utils import maximal_marginal_relevance
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+log = getLogger(__name__)
+
+COMPARISON_OPERATORS = {
+    "$eq": lambda actual, expected: actual == expected,
+    "$ne": lambda actual, expected: actual != expected,
+    "$lt": lambda actual, expected: actual < expected,
+    "$lte": lambda actual, expected: actual <= expected,
+    "$gt": lambda actual, expected: actual > expected,
+    "$gte": lambda actual, expected: actual >= expected,
+}
+
+
+def _coerce(actual, expected):
+    # HANA compares the JSON values with the type of the parameter, do the same
+    if actual is None or isinstance(expected, bool) or type(actual) is type(expected):
+        return actual
+    try:
+        return type(expected)(actual)
+    except (TypeError, ValueError):
+        return actual
+
+
+def _like_pattern(pattern: str) -> re.Pattern:
+    # SQL LIKE: % matches any sequence, _ matches a single character
+    regex = "".join(
+        ".*" if char == "%" else "." if char == "_" else re.escape(char) for char in pattern
+    )
+    return re.compile(f"^{regex}$", re.DOTALL)
+
+
+def matches_filter(metadata: dict, filter: Optional[dict]) -> bool:
+    """
+    Evaluates a HanaDB metadata filter against the metadata of a single document.
+
+    Supports plain equality, $eq, $ne, $lt, $lte, $gt, $gte, $in, $nin, $between, $like
+    and nested $and / $or, like HanaDB.
+    """
+    if not filter:
+        return True
+
+    for key, value in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, operand) for operand in value):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, operand) for operand in value):
+                return False
+            continue
+
+        actual = metadata.get(key)
+        if not isinstance(value, dict):
+            if _coerce(actual, value) != value:
+                return False
+            continue
+
+        operator, expected = next(iter(value.items()))
+        if isinstance(expected, dict) and expected.get("type") == "date":
+            expected = expected["date"]
+
+        if operator in COMPARISON_OPERATORS:
+            actual = _coerce(actual, expected)
+            if actual is None and operator != "$ne":
+                return False
+            try:
+                if not COMPARISON_OPERATORS[operator](actual, expected):
+                    return False
+            except TypeError:
+                return False
+        elif operator == "$between":
+            low, high = expected
+            actual = _coerce(actual, low)
+            if actual is None or not low <= actual <= high:
+                return False
+        elif operator == "$like":
+            if actual is None or not _like_pattern(expected).match(str(actual)):
+                return False
+        elif operator in ("$in", "$nin"):
+            if not isinstance(expected, list):
+                raise ValueError(f"Unsupported value for {operator}: {expected}")
+            found = any(_coerce(actual, entry) == entry for entry in expected)
+            if found != (operator == "$in"):
+                return False
+        else:
+            raise ValueError(f"Unsupported operator: {operator}")
+
+    return True
+
+
+class LocalVectorStore(VectorStore):
+    """
+    An in-process vector store with the subset of the HanaDB API used by the examples.
+
+    The vectors are kept L2-normalized in one contiguous float32 matrix, which grows by
+    doubling its capacity, so a cosine similarity search is a single matrix-vector
+    product followed by a partial sort for the top k. Metadata filters use the HanaDB
+    filter syntax. The store does not persist anything; it serves as an offline backend
+    for development and load tests and as a low-latency hot tier.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        table_name: str = "EMBEDDINGS",
+        initial_capacity: int = 1024,
+    ):
+        self.embedding = embedding
+        self.table_name = table_name
+        self._vectors = None
+        self._capacity = initial_capacity
+        self._size = 0
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._lock = threading.RLock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self):
+        return self._size
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        embeddings: Optional[list[list[float]]] = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        if embeddings is None:
+            embeddings = self.embedding.embed_documents(texts)
+        ids = kwargs.get("ids") or [str(uuid.uuid4()) for _ in texts]
+
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            self._reserve(self._size + len(texts), vectors.shape[1])
+            self._vectors[self._size : self._size + len(texts)] = vectors
+            self._size += len(texts)
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(dict(metadata) for metadata in metadatas)
+        return ids
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: Optional[list[dict]] = None,
+        table_name: str = "EMBEDDINGS",
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding=embedding, table_name=table_name)
+        store.add_texts(texts, metadatas)
+        return store
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> list[Document]:
+        return self.similarity_search_by_vector(
+            self.embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self.embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> list[Document]:
+        return [
+            document
+            for document, _ in self.similarity_search_with_score_by_vector(
+                embedding, k=k, filter=filter
+            )
+        ]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: list[float], k: int = 4, filter: Optional[dict] = None
+    ) -> list[tuple[Document, float]]:
+        return [
+            (document, score)
+            for document, score, _ in self._search(embedding, k=k, filter=filter)
+        ]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding.embed_query(query),
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            filter=filter,
+        )
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        results = self._search(embedding, k=fetch_k, filter=filter)
+        selected = maximal_marginal_relevance(
+            np.array(embedding), [vector for _, _, vector in results], lambda_mult=lambda_mult, k=k
+        )
+        return [results[index][0] for index in selected]
+
+    def delete(
+        self, ids: Optional[list[str]] = None, filter: Optional[dict] = None, **kwargs: Any
+    ) -> Optional[bool]:
+        """
+        Deletes entries by id or by metadata filter. An empty filter ({}) deletes all entries.
+        """
+        if ids is None and filter is None:
+            raise ValueError("Parameter 'filter' or 'ids' is required when calling 'delete'")
+
+        with self._lock:
+            if ids is not None:
+                ids = set(ids)
+                remove = np.fromiter(
+                    (id in ids for id in self._ids), dtype=bool, count=self._size
+                )
+            else:
+                remove = self._filter_mask(filter)
+
+            keep = ~remove
+            kept = int(keep.sum())
+            if kept < self._size:
+                self._vectors[:kept] = self._vectors[: self._size][keep]
+                self._ids = [id for id, k in zip(self._ids, keep) if k]
+                self._texts = [text for text, k in zip(self._texts, keep) if k]
+                self._metadatas = [m for m, k in zip(self._metadatas, keep) if k]
+                self._size = kept
+        return True
+
+    def _search(self, embedding: list[float], k: int, filter: Optional[dict]):
+        query = _normalize(np.asarray(embedding, dtype=np.float32)[np.newaxis, :])[0]
+
+        with self._lock:
+            if self._size == 0:
+                return []
+            vectors = self._vectors[: self._size]
+            scores = vectors @ query
+            if filter:
+                candidates = np.flatnonzero(self._filter_mask(filter))
+                scores = scores[candidates]
+            else:
+                candidates = None
+
+            k = min(k, len(scores))
+            if k == 0:
+                return []
+            if k < len(scores):
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            results = []
+            for position in top:
+                index = int(candidates[position]) if candidates is not None else int(position)
+                document = Document(
+                    page_content=self._texts[index], metadata=dict(self._metadatas[index])
+                )
+                results.append(
+                    (document, float(scores[position]), vectors[index].tolist())
+                )
+            return results
+
+    def _filter_mask(self, filter: Optional[dict]) -> np.ndarray:
+        if not filter:
+            return np.ones(self._size, dtype=bool)
+        return np.fromiter(
+            (matches_filter(metadata, filter) for metadata in self._metadatas),
+            dtype=bool,
+            count=self._size,
+        )
+
+    def _reserve(self, size: int, dimensions: int):
+        if self._vectors is None:
+            self._capacity = max(self._capacity, size)
+            self._vectors = np.empty((self._capacity, dimensions), dtype=np.float32)
+            return
+        if dimensions != self._vectors.shape[1]:
+            raise ValueError(
+                f"Expected vectors with {self._vectors.shape[1]} dimensions, got {dimensions}"
+            )
+        if size <= self._capacity:
+            return
+        while self._capacity < size:
+            self._capacity *= 2
+        vectors = np.empty((self._capacity, dimensions), dtype=np.float32)
+        vectors[: self._size] = self._vectors[: self._size]
+        self._vectors = vectors
+
+    @staticmethod
+    def _cosine_relevance_score_fn(distance: float) -> float:
+        # The scores are cosine similarities in [-1, 1], relevance scores must be in [0, 1]
+        return min(1.0, max(0.0, (1.0 + distance) / 2.0))
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._cosine_relevance_score_fn
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_local_vector_store(table_name: str, embeddings: Embeddings) -> LocalVectorStore:
+    """
+    Returns the in-process vector store for the given table name, so the ingestion and
+    the retrieval of an example share the same data.
+    """
+    with _stores_lock:
+        store = _stores.get(table_name)
+        if store is None:
+            store = _stores[table_name] = LocalVectorStore(embeddings, table_name=table_name)
+        else:
+            store.embedding = embeddings
+        return store
+
+
+def drop_local_vector_store(table_name: str):
+    with _stores_lock:
+        if _stores.pop(table_name, None) is None:
+            log.success("Nothing to clean up")
+        else:
+            log.success(f"Local vector store {table_name} dropped successfully.")
@@ -0,0 +1,343 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from logging import getLogger
+
+from langchain.schema import Document
+from langchain_community.vectorstores.hanavector import HanaDB
+
+from .hana_writer import INGEST_BATCH_SIZE, write_documents
+
+log = getLogger(__name__)
+
+MANIFEST_TABLE_SUFFIX = "_MANIFEST"
+# Positions of one source deleted per statement, each statement scans the vector table
+DELETE_KEYS_PER_STATEMENT = 500
+
+# Logged when an ingestion fails, the manifest keeps the committed batches
+RESUME_HINT = "The committed batches are kept, run the ingestion again to resume."
+
+
+@dataclass
+class SyncReport:
+    skipped: int = 0
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+    def __str__(self):
+        return (
+            f"{self.skipped} unchanged chunks skipped, {self.added} added, "
+            f"{self.updated} updated, {self.removed} removed"
+        )
+
+
+def chunk_key(document: Document) -> tuple[str, int]:
+    """
+    Returns the key identifying a chunk across ingestion runs: its source and start index.
+    Documents that were not split (e.g. PDF pages) fall back to their page number.
+    """
+    metadata = document.metadata
+    position = metadata.get("start_index", metadata.get("page", 0))
+    return str(metadata.get("source", "")), int(position)
+
+
+def is_duplicate_chunk(key: tuple[str, int], seen: set) -> bool:
+    """
+    Tells whether a chunk with the same key came before, and remembers the key otherwise.
+    Of several chunks with the same key only the first one is ingested, both by
+    `sync_documents` and by the ingestion pipeline.
+    """
+    if key in seen:
+        log.warning(f"Duplicate chunk key {key}, keeping the first chunk.")
+        return True
+    seen.add(key)
+    return False
+
+
+def content_hash(document: Document) -> str:
+    """
+    Returns the SHA-256 hash of the chunk text and its metadata, so metadata changes are
+    picked up as well.
+    """
+    digest = hashlib.sha256(document.page_content.encode("utf-8"))
+    digest.update(json.dumps(document.metadata, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Keeps track of the chunks stored in a vector table.
+
+    The manifest lives in a companion table `<TABLE>_MANIFEST` next to the vector table
+    and holds one row per chunk with its source, start index, content hash and the
+    embedding model used.
+    """
+
+    def __init__(self, connection, table_name: str):
+        self.connection = connection
+        self.table_name = f"{table_name}{MANIFEST_TABLE_SUFFIX}"
+
+    def ensure_table(self):
+        if self.exists():
+            return
+        cur = self.connection.cursor()
+        try:
+            log.info(f"Creating manifest table {self.table_name}")
+            cur.execute(
+                f'CREATE TABLE "{self.table_name}" ('
+                "SOURCE NVARCHAR(2000) NOT NULL, "
+                "START_INDEX INTEGER NOT NULL, "
+                "CONTENT_HASH VARCHAR(64) NOT NULL, "
+                "EMBEDDING_MODEL NVARCHAR(256) NOT NULL, "
+                "LOADED_AT TIMESTAMP NOT NULL, "
+                "PRIMARY KEY (SOURCE, START_INDEX))"
+            )
+        finally:
+            cur.close()
+
+    def load(self) -> dict:
+        """
+        Returns the manifest as a dict of chunk key -> (content hash, embedding model).
+        """
+        cur = self.connection.cursor()
+        try:
+            cur.execute(
+                f'SELECT SOURCE, START_INDEX, CONTENT_HASH, EMBEDDING_MODEL FROM "{self.table_name}"'
+            )
+            return {(row[0], row[1]): (row[2], row[3]) for row in cur.fetchall()}
+        finally:
+            cur.close()
+
+    def exists(self) -> bool:
+        cur = self.connection.cursor()
+        try:
+            cur.execute(
+                "SELECT COUNT(*) FROM TABLES WHERE SCHEMA_NAME = CURRENT_SCHEMA AND TABLE_NAME = ?",
+                (self.table_name,),
+            )
+            return cur.fetchone()[0] > 0
+        finally:
+            cur.close()
+
+    def version(self) -> tuple:
+        """
+        Returns the number of chunks and the time of the last load, which change with
+        every ingestion that adds, updates or removes chunks.
+        """
+        cur = self.connection.cursor()
+        try:
+            cur.execute(f'SELECT COUNT(*), MAX(LOADED_AT) FROM "{self.table_name}"')
+            return tuple(cur.fetchone())
+        finally:
+            cur.close()
+
+    def upsert(self, entries: list[tuple]):
+        """
+        Records chunks as stored. Entries are (source, start_index, content_hash, embedding_model).
+        """
+        if not entries:
+            return
+        cur = self.connection.cursor()
+        try:
+            cur.executemany(
+                f'UPSERT "{self.table_name}" (SOURCE, START_INDEX, CONTENT_HASH, EMBEDDING_MODEL, LOADED_AT) '
+                "VALUES (?, ?, ?, ?, CURRENT_UTCTIMESTAMP) WITH PRIMARY KEY",
+                entries,
+            )
+        finally:
+            cur.close()
+
+    def remove(self, keys: list[tuple]):
+        if not keys:
+            return
+        cur = self.connection.cursor()
+        try:
+            cur.executemany(
+                f'DELETE FROM "{self.table_name}" WHERE SOURCE = ? AND START_INDEX = ?',
+                keys,
+            )
+        finally:
+            cur.close()
+
+    def clear(self):
+        cur = self.connection.cursor()
+        try:
+            cur.execute(f'DELETE FROM "{self.table_name}"')
+        finally:
+            cur.close()
+
+
+def get_table_version(connection, table_name: str):
+    """
+    Returns a token that changes whenever the vector table is re-ingested or dropped,
+    None if the table does not exist.
+    """
+    manifest = IngestManifest(connection, table_name)
+    try:
+        cur = connection.cursor()
+        try:
+            cur.execute(f'SELECT COUNT(*) FROM "{table_name}"')
+            rows = cur.fetchone()[0]
+        finally:
+            cur.close()
+        return (rows, manifest.version() if manifest.exists() else None)
+    except Exception as e:
+        log.debug(f"Could not determine the version of {table_name}: {str(e)}")
+        return None
+
+
+def load_manifest(db: HanaDB) -> tuple[IngestManifest, dict]:
+    """
+    Creates the manifest of the vector table if needed and returns it with its entries.
+    A manifest without rows in the table is reset, rows without a manifest are deleted,
+    so that the manifest and the table agree before a synchronization.
+    """
+    manifest = IngestManifest(db.connection, db.table_name)
+    manifest.ensure_table()
+    stored = manifest.load()
+
+    rows_in_table = _count_rows(db)
+    if stored and rows_in_table == 0:
+        log.warning(f"Table {db.table_name} is empty, resetting the manifest.")
+        manifest.clear()
+        stored = {}
+    elif not stored and rows_in_table > 0:
+        log.warning(
+            f"Table {db.table_name} has no manifest, deleting {rows_in_table} existing rows."
+        )
+        db.delete(filter={})
+    return manifest, stored
+
+
+def _count_rows(db: HanaDB) -> int:
+    cur = db.connection.cursor()
+    try:
+        cur.execute(f'SELECT COUNT(*) FROM "{db.table_name}"')
+        return cur.fetchone()[0]
+    finally:
+        cur.close()
+
+
+def delete_chunks(db: HanaDB, keys: list[tuple]):
+    """
+    Deletes the chunks with the given keys from the vector table.
+
+    The source and the position are only stored in the metadata JSON, which has no
+    index, so every statement scans the table. The keys are therefore deleted with one
+    statement per source and up to DELETE_KEYS_PER_STATEMENT positions, instead of one
+    statement per key.
+    """
+    if not keys:
+        return
+    positions_by_source = {}
+    for source, position in keys:
+        positions_by_source.setdefault(source, []).append(str(position))
+
+    cur = db.connection.cursor()
+    try:
+        for source, positions in positions_by_source.items():
+            for start in range(0, len(positions), DELETE_KEYS_PER_STATEMENT):
+                batch = positions[start : start + DELETE_KEYS_PER_STATEMENT]
+                cur.execute(
+                    f'DELETE FROM "{db.table_name}" '
+                    f"WHERE JSON_VALUE(\"{db.metadata_column}\", '$.source') = ? "
+                    f"AND COALESCE(JSON_VALUE(\"{db.metadata_column}\", '$.start_index'), "
+                    f"JSON_VALUE(\"{db.metadata_column}\", '$.page')) "
+                    f"IN ({', '.join('?' * len(batch))})",
+                    (source, *batch),
+                )
+    finally:
+        cur.close()
+
+
+def sync_documents(
+    db: HanaDB,
+    chunks: list[Document],
+    embeddings_model_name: str,
+    batch_size: int = INGEST_BATCH_SIZE,
+    keep_sources: set[str] = frozenset(),
+) -> SyncReport:
+    """
+    Brings the vector table in line with the given chunks, embedding only what changed.
+
+    Chunks whose key, content hash and embedding model match the manifest are skipped.
+    New and changed chunks are embedded and written, chunks that are no longer part of
+    the corpus (and the old versions of changed chunks) are deleted.
+
+    The manifest doubles as checkpoint: each batch is committed together with its
+    manifest rows and the deletion of the old versions of its chunks. If the ingestion
+    fails halfway, e.g. when the proxy keeps rate limiting, the committed batches are
+    kept and the next run resumes with the chunks that were not committed yet.
+
+    Args:
+        db (HanaDB): The vector store to synchronize.
+        chunks (list[Document]): The complete, current set of document chunks.
+        embeddings_model_name (str): The name of the embedding model used by the vector store.
+        batch_size (int, optional): The number of chunks per write batch. Defaults to INGEST_BATCH_SIZE.
+        keep_sources (set[str], optional): Sources whose stored chunks are kept even
+            though they are missing from `chunks`, e.g. because loading them failed.
+
+    Returns:
+        SyncReport: The number of skipped, added, updated and removed chunks.
+    """
+    if not isinstance(db, HanaDB):
+        return _replace_documents(db, chunks, batch_size)
+
+    manifest, stored = load_manifest(db)
+
+    incoming = {}
+    seen = set()
+    for chunk in chunks:
+        key = chunk_key(chunk)
+        if is_duplicate_chunk(key, seen):
+            continue
+        incoming[key] = (chunk, content_hash(chunk))
+
+    report = SyncReport()
+    to_write = []
+    for key, (chunk, chunk_hash) in incoming.items():
+        if stored.get(key) == (chunk_hash, embeddings_model_name):
+            report.skipped += 1
+            continue
+        if key in stored:
+            report.updated += 1
+        else:
+            report.added += 1
+        to_write.append(chunk)
+
+    vanished = [
+        key for key in stored if key not in incoming and key[0] not in keep_sources
+    ]
+    report.removed = len(vanished)
+
+    log.info(
+        f"Delta for {db.table_name}: {len(to_write)} chunks to embed, "
+        f"{len(vanished) + report.updated} to delete, {report.skipped} unchanged."
+    )
+    delete_chunks(db, vanished)
+    manifest.remove(vanished)
+
+    def checkpoint(cursor, batch: list[Document]):
+        keys = [chunk_key(chunk) for chunk in batch]
+        delete_chunks(db, [key for key in keys if key in stored])
+        manifest.upsert(
+            [(*key, incoming[key][1], embeddings_model_name) for key in keys]
+        )
+
+    if to_write:
+        write_documents(db, to_write, batch_size=batch_size, on_batch=checkpoint)
+
+    log.success(f"Synchronized {db.table_name}: {report}")
+    return report
+
+
+def _replace_documents(db, chunks: list[Document], batch_size: int) -> SyncReport:
+    # In-process vector stores have no manifest table; the embedding cache keeps
+    # reloading them cheap
+    db.delete(filter={})
+    for start in range(0, len(chunks), batch_size):
+        db.add_documents(chunks[start : start + batch_size])
+    report = SyncReport(added=len(chunks))
+    log.success(f"Loaded {db.table_name} into the local vector store: {report}")
+    return report
@@ -0,0 +1,312 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Iterable, Optional
+
+from langchain.schema import Document
+from langchain_community.vectorstores.hanavector import HanaDB
+
+from .hana_writer import INGEST_BATCH_SIZE, HanaVectorWriter
+from .manifest import (
+    SyncReport,
+    chunk_key,
+    content_hash,
+    delete_chunks,
+    is_duplicate_chunk,
+    load_manifest,
+)
+from .rag import create_text_splitter
+
+log = getLogger(__name__)
+
+# Maximum number of items (documents or batches) waiting between two stages
+PIPELINE_QUEUE_SIZE = 4
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    pass
+
+
+@dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    queue_depth_samples: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """
+        Items produced per second of work, without the time spent waiting on other stages.
+        """
+        return self.items_out / self.busy_seconds if self.busy_seconds else 0.0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        if not self.queue_depth_samples:
+            return 0.0
+        return self.queue_depth_total / self.queue_depth_samples
+
+    def sample_queue(self, depth: int):
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.queue_depth_total += depth
+        self.queue_depth_samples += 1
+
+    def __str__(self):
+        return (
+            f"{self.name:>5}: {self.items_in} in, {self.items_out} out, "
+            f"{self.throughput:.1f} items/s, busy {self.busy_seconds:.1f}s, "
+            f"blocked {self.blocked_seconds:.1f}s, input queue depth "
+            f"mean {self.mean_queue_depth:.1f} / max {self.max_queue_depth}"
+        )
+
+
+class IngestionPipeline:
+    """
+    Streams documents into the table of a HanaDB vector store in four stages.
+
+    load -> split -> embed -> write run in their own threads, connected by bounded
+    queues. Documents are pulled from the loader one at a time, split and compared with
+    the manifest, so unchanged chunks are dropped before they are embedded. The new and
+    changed chunks are grouped into batches, embedded and written, each batch in its own
+    transaction together with its manifest rows. Only a few documents and batches are
+    held in memory at any time, and the first rows are written while the loader is still
+    reading. Chunks that are no longer part of the corpus are deleted once the stream
+    ends. The statistics of each stage are available in `stats`, also while running.
+    """
+
+    def __init__(
+        self,
+        db: HanaDB,
+        embeddings_model_name: str,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100,
+        batch_size: int = INGEST_BATCH_SIZE,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        chunk_length: str = "characters",
+    ):
+        assert isinstance(db, HanaDB), "The ingestion pipeline writes to a HanaDB vector store"
+        assert queue_size > 0, "Queue size must be greater than 0"
+
+        self.db = db
+        self.embeddings_model_name = embeddings_model_name
+        self.splitter = create_text_splitter(
+            chunk_size, chunk_overlap, length=chunk_length, model_name=embeddings_model_name
+        )
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.writer = HanaVectorWriter(db, batch_size=batch_size)
+        self.report = SyncReport()
+        self.stats = {
+            name: StageStats(name) for name in ("load", "split", "embed", "write")
+        }
+
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def run(self, documents: Iterable[Document]) -> SyncReport:
+        """
+        Ingests the documents, usually the `lazy_load()` iterator of a loader.
+
+        Returns:
+            SyncReport: The number of skipped, added, updated and removed chunks.
+        """
+        started = time.perf_counter()
+        manifest, stored = load_manifest(self.db)
+        seen = set()
+
+        loaded = queue.Queue(maxsize=self.queue_size)
+        split = queue.Queue(maxsize=self.queue_size)
+        embedded = queue.Queue(maxsize=self.queue_size)
+        stages = [
+            threading.Thread(target=self._guard, args=(self._load, documents, loaded)),
+            threading.Thread(
+                target=self._guard, args=(self._split, loaded, split, stored, seen)
+            ),
+            threading.Thread(target=self._guard, args=(self._embed, split, embedded)),
+            threading.Thread(target=self._guard, args=(self._write, embedded, manifest)),
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+        if self._error is not None:
+            raise self._error
+
+        vanished = [key for key in stored if key not in seen]
+        self.report.removed = len(vanished)
+        delete_chunks(self.db, vanished)
+        manifest.remove(vanished)
+
+        log.success(
+            f"Streamed into {self.db.table_name} in {time.perf_counter() - started:.1f}s: "
+            f"{self.report}"
+        )
+        return self.report
+
+    def _guard(self, stage, *args):
+        try:
+            stage(*args)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            self._stop.set()
+
+    def _put(self, q: queue.Queue, item, stats: StageStats):
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise _Stopped()
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.blocked_seconds += time.perf_counter() - started
+
+    def _get(self, q: queue.Queue, stats: StageStats):
+        stats.sample_queue(q.qsize())
+        started = time.perf_counter()
+        try:
+            while True:
+                if self._stop.is_set():
+                    raise _Stopped()
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+        finally:
+            stats.blocked_seconds += time.perf_counter() - started
+
+    def _load(self, documents: Iterable[Document], out: queue.Queue):
+        stats = self.stats["load"]
+        iterator = iter(documents)
+        while True:
+            started = time.perf_counter()
+            document = next(iterator, _DONE)
+            stats.busy_seconds += time.perf_counter() - started
+            if document is _DONE:
+                break
+            stats.items_in += 1
+            stats.items_out += 1
+            self._put(out, document, stats)
+        self._put(out, _DONE, stats)
+
+    def _split(self, inbox: queue.Queue, out: queue.Queue, stored: dict, seen: set):
+        stats = self.stats["split"]
+        batch = []
+        while (document := self._get(inbox, stats)) is not _DONE:
+            started = time.perf_counter()
+            stats.items_in += 1
+            for chunk in self.splitter.split_documents([document]):
+                key = chunk_key(chunk)
+                if is_duplicate_chunk(key, seen):
+                    continue
+
+                chunk_hash = content_hash(chunk)
+                if stored.get(key) == (chunk_hash, self.embeddings_model_name):
+                    self.report.skipped += 1
+                    continue
+                if key in stored:
+                    self.report.updated += 1
+                else:
+                    self.report.added += 1
+                batch.append((chunk, key in stored, (*key, chunk_hash, self.embeddings_model_name)))
+            stats.busy_seconds += time.perf_counter() - started
+
+            # A large document can fill several batches
+            while len(batch) >= self.batch_size:
+                stats.items_out += 1
+                self._put(out, batch[: self.batch_size], stats)
+                batch = batch[self.batch_size :]
+
+        if batch:
+            stats.items_out += 1
+            self._put(out, batch, stats)
+        self._put(out, _DONE, stats)
+
+    def _embed(self, inbox: queue.Queue, out: queue.Queue):
+        stats = self.stats["embed"]
+        while (batch := self._get(inbox, stats)) is not _DONE:
+            started = time.perf_counter()
+            stats.items_in += 1
+            embeddings = self.writer.embed_batch([chunk for chunk, _, _ in batch])
+            stats.busy_seconds += time.perf_counter() - started
+            stats.items_out += 1
+            self._put(out, (batch, embeddings), stats)
+        self._put(out, _DONE, stats)
+
+    def _write(self, inbox: queue.Queue, manifest):
+        stats = self.stats["write"]
+        connection = self.db.connection
+        autocommit = connection.getautocommit()
+        connection.setautocommit(False)
+        cursor = connection.cursor()
+        try:
+            while (item := self._get(inbox, stats)) is not _DONE:
+                started = time.perf_counter()
+                batch, embeddings = item
+                stats.items_in += 1
+                # The old version of a changed chunk, the new one and its manifest row
+                # are committed together
+                delete_chunks(self.db, [entry[:2] for _, updated, entry in batch if updated])
+                self.writer.insert_batch(cursor, [chunk for chunk, _, _ in batch], embeddings)
+                manifest.upsert([entry for _, _, entry in batch])
+                connection.commit()
+                stats.busy_seconds += time.perf_counter() - started
+                stats.items_out += 1
+                log.info(
+                    f"Committed batch {self.writer.stats.batches} "
+                    f"({self.writer.stats.rows} rows written)"
+                )
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            connection.setautocommit(autocommit)
+
+
+def log_pipeline_stats(pipeline: IngestionPipeline):
+    log.info("Ingestion pipeline stages (items are documents for load, batches otherwise):")
+    for stats in pipeline.stats.values():
+        log.info(str(stats))
+
+
+def stream_documents(
+    db: HanaDB,
+    documents: Iterable[Document],
+    embeddings_model_name: str,
+    **kwargs,
+) -> SyncReport:
+    """
+    Streams documents through the ingestion pipeline into the HanaDB vector store and
+    logs the statistics of its stages.
+
+    Args:
+        db (HanaDB): The vector store to write to.
+        documents (Iterable[Document]): The documents to ingest, e.g. `loader.lazy_load()`.
+        embeddings_model_name (str): The name of the embedding model used by the vector store.
+        **kwargs: chunk_size, chunk_overlap, chunk_length, batch_size and queue_size of
+            the pipeline.
+
+    Returns:
+        SyncReport: The number of skipped, added, updated and removed chunks.
+    """
+    pipeline = IngestionPipeline(db, embeddings_model_name, **kwargs)
+    try:
+        return pipeline.run(documents)
+    finally:
+        log_pipeline_stats(pipeline)
@@ -1,12 +1,125 @@
+import importlib.util
 import logging
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 from langchain.schema import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from .text_splitter import OffsetRecursiveTextSplitter
+from .tokens import count_tokens, get_tokenizer
 
 log = logging.getLogger(__name__)
 
+# Above this number of characters, the documents are split in a process pool
+PARALLEL_SPLIT_MIN_CHARS = 2_000_000
+# Number of shards per worker process, smaller shards balance the load better
+SPLIT_SHARDS_PER_WORKER = 4
+
+
+def create_text_splitter(
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    length: str = "characters",
+    model_name: str = None,
+):
+    """
+    Returns the text splitter used for the document chunks of the examples.
+
+    With `length="characters"` it returns the same chunks as RecursiveCharacterTextSplitter
+    with `length_function=len`. With `length="tokens"`, chunk size and overlap are counted
+    in tokens of the tokenizer of `model_name`, so chunks fit the embedding model.
+
+    Raises:
+        ImportError: If `length="tokens"` and tiktoken is not installed.
+    """
+    assert length in ("characters", "tokens"), f"Unsupported chunk length: {length}"
+    if length == "tokens":
+        # Estimated token counts can exceed the limit of the embedding model, so do not
+        # silently fall back to them
+        if importlib.util.find_spec("tiktoken") is None:
+            raise ImportError(
+                'Chunk length "tokens" requires tiktoken, install it with `pip install tiktoken`.'
+            )
+        if get_tokenizer(model_name) is None:
+            log.warning(
+                f"The tokenizer of {model_name or 'the embedding model'} could not be loaded, "
+                "the chunk sizes are ESTIMATED at 4 characters per token and may not fit "
+                "the embedding model."
+            )
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=partial(count_tokens, model_name=model_name),
+            add_start_index=True,
+        )
+    return OffsetRecursiveTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        add_start_index=True,
+    )
+
+
+def _split_shard(documents: list[Document], chunk_size: int, chunk_overlap: int, *args):
+    splitter = create_text_splitter(chunk_size, chunk_overlap, *args)
+    return splitter.split_documents(documents)
+
+
+def _shard_documents(documents: list[Document], shards: int) -> list[list[Document]]:
+    # Contiguous shards of about the same number of characters, so that concatenating
+    # the results keeps the order of the serial split
+    total_chars = sum(len(document.page_content) for document in documents)
+    target = max(1, total_chars // shards)
+    result, shard, shard_chars = [], [], 0
+    for document in documents:
+        shard.append(document)
+        shard_chars += len(document.page_content)
+        if shard_chars >= target:
+            result.append(shard)
+            shard, shard_chars = [], 0
+    if shard:
+        result.append(shard)
+    return result
+
+
+def split_docs_in_parallel(
+    documents: list[Document],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    max_workers: int = None,
+    length: str = "characters",
+    model_name: str = None,
+) -> list[Document]:
+    """
+    Splits the documents in a process pool. Every document is split on its own, so the
+    chunks, their order and their `start_index` are the same as with the serial split.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    shards = _shard_documents(documents, max_workers * SPLIT_SHARDS_PER_WORKER)
+    if max_workers == 1 or len(shards) <= 1:
+        return _split_shard(documents, chunk_size, chunk_overlap, length, model_name)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(
+            _split_shard,
+            shards,
+            [chunk_size] * len(shards),
+            [chunk_overlap] * len(shards),
+            [length] * len(shards),
+            [model_name] * len(shards),
+        )
+        return [chunk for shard_chunks in results for chunk in shard_chunks]
+
 
 def split_docs_into_chunks(
-    documents: list[Document], chunk_size: int = 1000, chunk_overlap: int = 100
+    documents: list[Document],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 100,
+    parallel: bool = None,
+    max_workers: int = None,
+    length: str = "characters",
+    model_name: str = None,
 ):
     """
     Splits a list of documents into chunks of specified size with overlap.
@@ -15,20 +128,38 @@ def split_docs_into_chunks(
         documents (list[Document]): The list of documents to be split into chunks.
         chunk_size (int, optional): The size of each chunk. Defaults to 1000.
         chunk_overlap (int, optional): The overlap between consecutive chunks. Defaults to 100.
+        parallel (bool, optional): Split in a process pool. Defaults to None, which splits
+            in parallel when the documents exceed PARALLEL_SPLIT_MIN_CHARS characters.
+        max_workers (int, optional): The number of processes. Defaults to the CPU count.
+        length (str, optional): "characters" or "tokens", the unit of chunk size and
+            overlap. Defaults to "characters".
+        model_name (str, optional): The embedding model whose tokenizer counts the tokens.
 
     Returns:
         list[list[Document]]: A list of chunks, where each chunk is a list of documents.
 
     """
     try:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            add_start_index=True,
+        if parallel is None:
+            total_chars = sum(len(document.page_content) for document in documents)
+            parallel = total_chars >= PARALLEL_SPLIT_MIN_CHARS
+
+        if parallel:
+            chunks = split_docs_in_parallel(
+                documents,
+                chunk_size,
+                chunk_overlap,
+                max_workers=max_workers,
+                length=length,
+                model_name=model_name,
+            )
+        else:
+            text_splitter = create_text_splitter(chunk_size, chunk_overlap, length, model_name)
+            chunks = text_splitter.split_documents(documents)
+        log.info(
+            f"Split {len(documents)} documents into {len(chunks)} chunks"
+            f"{' in parallel' if parallel else ''}."
         )
-        chunks = text_splitter.split_documents(documents)
-        log.info(f"Split {len(documents)} documents into {len(chunks)} chunks.")
 
         return chunks
     except Exception as e:
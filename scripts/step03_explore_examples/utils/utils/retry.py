@@ -0,0 +1,20 @@
+from typing import Optional
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """
+    Returns the HTTP status code of a failed request, from the error of the OpenAI
+    client or of requests. None if the error carries no status code.
+    """
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Tells whether a failed request is worth retrying: throttled (429) or a server error (5xx).
+    """
+    code = status_code(error)
+    return code is not None and (code == 429 or code >= 500)
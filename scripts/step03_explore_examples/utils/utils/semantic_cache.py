@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Callable, Optional
+
+import numpy as np
+from langchain.chains.conversational_retrieval.base import _get_chat_history
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+log = getLogger(__name__)
+
+# Defaults for the semantic answer cache
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_MAX_ENTRIES = 256
+SEMANTIC_CACHE_TTL_SECONDS = 3600
+# Seconds between two checks whether the underlying table was re-ingested
+SEMANTIC_CACHE_VERSION_CHECK_SECONDS = 10
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    source_documents: list[Document]
+    created_at: float = 0.0
+
+
+class SemanticAnswerCache:
+    """
+    Caches answers by the meaning of the question.
+
+    Every entry holds the normalized embedding of a question, the answer and the source
+    documents it was based on. A question is answered from the cache when the cosine
+    similarity to a cached question reaches the threshold. Entries expire after
+    `ttl_seconds`, the least recently used entries are evicted beyond `max_entries`, and
+    the whole cache is invalidated as soon as `version()` reports a different version of
+    the underlying table, i.e. after the table was re-ingested.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        version: Optional[Callable[[], object]] = None,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+    ):
+        assert 0 < threshold <= 1, "Threshold must be in (0, 1]"
+
+        self.embeddings = embeddings
+        self.version = version
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()
+        self._vectors = {}
+        self._matrix = None
+        self._matrix_keys = []
+        self._next_key = 0
+        self._version = None
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def lookup(self, question: str, vector: list[float] = None) -> Optional[CachedAnswer]:
+        """
+        Returns the cached answer of the most similar question, None on a miss.
+        """
+        self._check_version()
+        vector = _normalize(
+            vector if vector is not None else self.embeddings.embed_query(question)
+        )
+
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries)
+                self._matrix = np.stack([self._vectors[key] for key in self._matrix_keys])
+            similarities = self._matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            key = self._matrix_keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry = self._entries[key]
+            log.info(
+                f"Semantic cache hit (similarity {similarities[best]:.3f}) "
+                f"for the question: {entry.question}"
+            )
+            return entry
+
+    def store(self, question: str, answer: str, source_documents: list[Document], vector=None):
+        vector = _normalize(
+            vector if vector is not None else self.embeddings.embed_query(question)
+        )
+        entry = CachedAnswer(
+            question=question,
+            answer=answer,
+            source_documents=list(source_documents),
+            created_at=time.monotonic(),
+        )
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = entry
+            self._vectors[key] = vector
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                del self._vectors[evicted]
+                self.evictions += 1
+            self._matrix = None
+
+    def set_version(self, version: Callable[[], object]):
+        """
+        Replaces the version function, the version is checked on the next lookup.
+        """
+        self.version = version
+        self._version_checked_at = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if now - entry.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+            del self._vectors[key]
+            self.evictions += 1
+        if expired:
+            self._matrix = None
+
+    def _check_version(self):
+        if self.version is None:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < SEMANTIC_CACHE_VERSION_CHECK_SECONDS:
+            return
+
+        version = self.version()
+        self._version_checked_at = now
+        if self._version is not None and version != self._version:
+            log.info("The table was re-ingested, invalidating the semantic cache")
+            self.clear()
+            self.invalidations += 1
+        self._version = version
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCachedChain:
+    """
+    Puts a SemanticAnswerCache in front of a ConversationalRetrievalChain.
+
+    Answers are looked up and stored under the standalone question: a first question is
+    its own standalone question, a follow-up question is condensed with the chat history
+    by the question generator of the chain first, like the chain would do. On a miss,
+    the standalone question is answered by a copy of the chain without memory, so it is
+    not generated twice. Either way, the exchange is added to the memory of the chain
+    like a regular answer.
+    """
+
+    def __init__(self, chain, cache: SemanticAnswerCache):
+        self.chain = chain
+        self.cache = cache
+        # Answers standalone questions, the chat history is handled here
+        self._answer_chain = chain.model_copy(
+            update={"memory": None, "return_generated_question": True}
+        )
+
+    @property
+    def memory(self):
+        return self.chain.memory
+
+    def invoke(self, inputs: dict, config: dict = None) -> dict:
+        question = inputs["question"]
+        standalone_question = self._standalone_question(question, config)
+        vector = self.cache.embeddings.embed_query(standalone_question)
+
+        cached = self.cache.lookup(standalone_question, vector=vector)
+        if cached is not None:
+            result = {
+                "question": question,
+                "answer": cached.answer,
+                "source_documents": cached.source_documents,
+                "generated_question": standalone_question,
+                "cached": True,
+            }
+        else:
+            result = self._answer_chain.invoke(
+                {"question": standalone_question, "chat_history": []}, config=config
+            )
+            self.cache.store(
+                standalone_question,
+                result["answer"],
+                result.get("source_documents", []),
+                vector=vector,
+            )
+            result = {**result, "question": question, "cached": False}
+
+        if self.memory:
+            self.memory.save_context({"question": question}, {"answer": result["answer"]})
+        return result
+
+    def _standalone_question(self, question: str, config: dict = None) -> str:
+        chat_history = (
+            self.memory.load_memory_variables({}).get("chat_history") if self.memory else None
+        )
+        if not chat_history:
+            return question
+        get_chat_history = self.chain.get_chat_history or _get_chat_history
+        return self.chain.question_generator.invoke(
+            {"question": question, "chat_history": get_chat_history(chat_history)},
+            config=config,
+        )["text"]
+
+
+def log_semantic_cache_stats(cache: SemanticAnswerCache):
+    log.info(
+        "Semantic answer cache: {entries} entries, {hits} hits, {misses} misses "
+        "({hit_rate:.0%} hit rate), {evictions} evicted, {invalidations} invalidations".format(
+            **cache.stats()
+        )
+    )
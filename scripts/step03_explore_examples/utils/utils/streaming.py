@@ -0,0 +1,94 @@
+import sys
+import time
+from logging import getLogger
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+log = getLogger(__name__)
+
+
+def log_stream_timings(started: float, first_token_at: float, finished: float):
+    if first_token_at is None:
+        log.info(f"No tokens streamed, total time {finished - started:.2f}s")
+        return
+    log.info(
+        f"Time to first token {first_token_at - started:.2f}s, "
+        f"total time {finished - started:.2f}s"
+    )
+
+
+def stream_answer(chain, inputs, answer_key: str = None, config: dict = None, out=sys.stdout):
+    """
+    Streams the answer of a LCEL chain to the console while it is generated.
+
+    Chains ending in a StrOutputParser stream string chunks. For chains producing a dict
+    (e.g. `RunnableParallel(...).assign(answer=...)`), the chunks of `answer_key` are
+    printed and the other keys, such as the retrieved context, are collected and
+    returned once the stream ends. Time to first token and total time are logged.
+
+    Args:
+        chain: The runnable to stream.
+        inputs: The input of the chain.
+        answer_key (str, optional): The output key holding the answer of a dict chain.
+        config (dict, optional): The runnable config.
+        out (optional): The stream to print to. Defaults to stdout.
+
+    Returns:
+        tuple[str, dict]: The full answer and the other outputs of a dict chain.
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    answer_parts = []
+    outputs = {}
+
+    for chunk in chain.stream(inputs, config=config):
+        if isinstance(chunk, dict):
+            token = chunk.get(answer_key, "") if answer_key else ""
+            for key, value in chunk.items():
+                if key != answer_key:
+                    outputs[key] = value
+        else:
+            token = chunk
+        if not token:
+            continue
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        answer_parts.append(token)
+        out.write(token)
+        out.flush()
+
+    out.write("\n")
+    log_stream_timings(started, first_token_at, time.perf_counter())
+    return "".join(answer_parts), outputs
+
+
+class TokenPrinter(BaseCallbackHandler):
+    """
+    Prints the tokens of a streaming LLM as they arrive.
+
+    For legacy chains (e.g. ConversationalRetrievalChain) that do not stream their
+    output: attach the handler to the LLM that generates the answer, call `start()`
+    before invoking the chain and `finish()` afterwards to log the timings.
+    """
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.started = None
+        self.first_token_at = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.first_token_at = None
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        if not token:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.out.write(token)
+        self.out.flush()
+
+    def finish(self):
+        if self.first_token_at is not None:
+            self.out.write("\n")
+        log_stream_timings(self.started, self.first_token_at, time.perf_counter())
@@ -0,0 +1,175 @@
+import copy
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+from langchain.schema import Document
+from langchain_text_splitters import TextSplitter
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def _copy_metadata(metadata: dict) -> dict:
+    # Flat metadata (the common case) does not need the deep copy
+    if all(isinstance(value, _IMMUTABLE_TYPES) for value in metadata.values()):
+        return dict(metadata)
+    return copy.deepcopy(metadata)
+
+
+@lru_cache(maxsize=64)
+def _separator_pattern(separator: str) -> re.Pattern:
+    # Searching with pos/endpos finds the non-overlapping occurrences in a range of the
+    # text without slicing it
+    return re.compile(re.escape(separator))
+
+
+class OffsetRecursiveTextSplitter(TextSplitter):
+    """
+    A drop-in replacement for RecursiveCharacterTextSplitter with `length_function=len`.
+
+    It returns the same chunks and `start_index` values as the LangChain splitter with
+    literal separators kept at the start of the splits (the defaults), but works on
+    (start, end) offsets into the original text: separators are located in ranges of
+    the text instead of splitting copies of it, splits are never copied or joined (a
+    chunk is one slice of the text), and the start of every chunk is known from its
+    offsets instead of searching the text for it.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 4000,
+        chunk_overlap: int = 200,
+        separators: Optional[list[str]] = None,
+        add_start_index: bool = False,
+        strip_whitespace: bool = True,
+    ):
+        super().__init__(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            keep_separator=True,
+            add_start_index=add_start_index,
+            strip_whitespace=strip_whitespace,
+        )
+        self._separators = separators or DEFAULT_SEPARATORS
+
+    def split_text(self, text: str) -> list[str]:
+        return [chunk for chunk, _ in self.split_text_with_offsets(text)]
+
+    def split_text_with_offsets(self, text: str) -> list[tuple[str, int]]:
+        """
+        Returns the chunks of the text with the offsets they start at.
+        """
+        chunks = []
+        self._split(text, 0, len(text), self._separators, chunks)
+        return chunks
+
+    def create_documents(
+        self, texts: list[str], metadatas: Optional[list[dict[Any, Any]]] = None
+    ) -> list[Document]:
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        for text, metadata in zip(texts, metadatas):
+            index = 0
+            previous_chunk_len = 0
+            for chunk, start in self.split_text_with_offsets(text):
+                chunk_metadata = _copy_metadata(metadata)
+                if self._add_start_index:
+                    # LangChain reports the first occurrence of the chunk after the end
+                    # of the previous chunk minus the overlap. The chunk starts at
+                    # `start`, so only an identical copy in between (repetitive text)
+                    # can come first; looking for it is bounded to that window.
+                    offset = max(0, index + previous_chunk_len - self._chunk_overlap)
+                    if start >= offset:
+                        index = text.find(chunk, offset, start + len(chunk))
+                    else:
+                        index = text.find(chunk, offset)
+                    chunk_metadata["start_index"] = index
+                    previous_chunk_len = len(chunk)
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
+
+    def split_documents(self, documents: Iterable[Document]) -> list[Document]:
+        texts, metadatas = [], []
+        for document in documents:
+            texts.append(document.page_content)
+            metadatas.append(document.metadata)
+        return self.create_documents(texts, metadatas=metadatas)
+
+    def _split(self, text: str, start: int, end: int, separators: list[str], chunks: list):
+        # Pick the first separator present in text[start:end], like the LangChain splitter
+        separator = separators[-1]
+        next_separators = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                next_separators = separators[i + 1 :]
+                break
+
+        splits = self._splits(text, start, end, separator)
+        # Splits shorter than the chunk size are merged, good_start is the first of them
+        good_start = 0
+        for position, (split_start, split_end) in enumerate(splits):
+            if split_end - split_start < self._chunk_size:
+                continue
+            if good_start < position:
+                self._merge(text, splits, good_start, position, chunks)
+            good_start = position + 1
+            if not next_separators:
+                chunks.append((text[split_start:split_end], split_start))
+            else:
+                self._split(text, split_start, split_end, next_separators, chunks)
+        if good_start < len(splits):
+            self._merge(text, splits, good_start, len(splits), chunks)
+
+    @staticmethod
+    def _splits(text: str, start: int, end: int, separator: str):
+        # Splits keep their separator at the start, empty splits are dropped
+        if separator == "":
+            return [(position, position + 1) for position in range(start, end)]
+
+        splits = []
+        split_start = start
+        for match in _separator_pattern(separator).finditer(text, start, end):
+            position = match.start()
+            if position > split_start:
+                splits.append((split_start, position))
+            split_start = position
+        if end > split_start:
+            splits.append((split_start, end))
+        return splits
+
+    def _merge(self, text: str, splits: list, first: int, last: int, chunks: list):
+        # The splits are adjacent in the text, so a chunk is the slice from the start of
+        # its first split (head) to the end of its last one
+        chunk_size, chunk_overlap = self._chunk_size, self._chunk_overlap
+        head = first
+        total = 0
+        for position in range(first, last):
+            split_start, split_end = splits[position]
+            length = split_end - split_start
+            if total + length > chunk_size and head < position:
+                self._emit(text, splits[head][0], splits[position - 1][1], chunks)
+                while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                    head_start, head_end = splits[head]
+                    total -= head_end - head_start
+                    head += 1
+            total += length
+        if head < last:
+            self._emit(text, splits[head][0], splits[last - 1][1], chunks)
+
+    def _emit(self, text: str, start: int, end: int, chunks: list):
+        if self._strip_whitespace:
+            # Same as str.strip(), but on the offsets, so only the chunk is copied
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start == end:
+                return
+        chunks.append((text[start:end], start))
@@ -0,0 +1,62 @@
+import os
+from functools import lru_cache
+from logging import getLogger
+from typing import Optional
+
+from .kvstore import CACHE_DIR
+
+log = getLogger(__name__)
+
+# Encoding of the OpenAI embedding models (ada-002 and the text-embedding-3 family)
+DEFAULT_ENCODING = "cl100k_base"
+# Keep the downloaded BPE ranks next to the other caches, so they are fetched only once
+TIKTOKEN_CACHE_DIR = os.path.join(CACHE_DIR, "tiktoken")
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough estimate for English text and the OpenAI tokenizers: ~4 characters per token
+    return len(text) // 4 + 1
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(model_name: Optional[str] = None):
+    """
+    Returns the tiktoken encoding of the model, loaded once per process. Falls back to
+    DEFAULT_ENCODING for unknown models. Returns None if tiktoken is not installed or the
+    encoding cannot be loaded (e.g. offline without a cached copy), in which case the
+    token counts are estimated.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        log.warning("tiktoken is not installed, token counts are estimated.")
+        return None
+
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", TIKTOKEN_CACHE_DIR)
+    try:
+        if model_name:
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        log.warning(f"Could not load the tokenizer, token counts are estimated: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    tokenizer = get_tokenizer(model_name)
+    if tokenizer is None:
+        return estimate_tokens(text)
+    return len(tokenizer.encode_ordinary(text))
+
+
+def count_tokens_batch(texts: list[str], model_name: Optional[str] = None) -> list[int]:
+    """
+    Counts the tokens of many texts at once, tiktoken encodes them on several threads.
+    """
+    tokenizer = get_tokenizer(model_name)
+    if tokenizer is None:
+        return [estimate_tokens(text) for text in texts]
+    return [len(tokens) for tokens in tokenizer.encode_ordinary_batch(texts)]
@@ -0,0 +1,163 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging import getLogger
+from typing import Iterator, Optional
+
+import requests
+from langchain.schema import Document
+from langchain_community.document_loaders import WikipediaLoader
+from langchain_community.document_loaders.base import BaseLoader
+
+from .kvstore import CACHE_DIR, SqliteKVStore
+
+log = getLogger(__name__)
+
+WIKIPEDIA_CACHE_PATH = os.path.join(CACHE_DIR, "wikipedia.sqlite")
+WIKIPEDIA_FETCH_WORKERS = 8
+# The MediaWiki API accepts up to 50 titles per query
+_TITLES_PER_REQUEST = 50
+
+
+class CachedWikipediaLoader(BaseLoader):
+    """
+    Loads the top Wikipedia page for each of many queries, concurrently and cached.
+
+    Every page is stored in a local cache under its query, together with the revision
+    it was fetched at. On later runs the current revisions of the cached pages are looked
+    up in a few batched API calls, and only pages that changed or are not cached yet are
+    fetched again, on a bounded thread pool. `lazy_load` yields the cached pages first and
+    then every fetched page as soon as it arrives, so it can be split and embedded while
+    the other pages are still downloading. A page that cannot be fetched is counted as
+    failed and replaced by its cached revision, if there is one. The documents are the same as the ones of
+    `WikipediaLoader(query=query, load_max_docs=1)`.
+    """
+
+    def __init__(
+        self,
+        queries: list[str],
+        lang: str = "en",
+        doc_content_chars_max: int = 4000,
+        max_workers: int = WIKIPEDIA_FETCH_WORKERS,
+        cache_path: str = WIKIPEDIA_CACHE_PATH,
+    ):
+        self.queries = list(dict.fromkeys(queries))
+        self.lang = lang
+        self.doc_content_chars_max = doc_content_chars_max
+        self.max_workers = max_workers
+        self.store = SqliteKVStore(cache_path)
+        self.stats = {"cached": 0, "fetched": 0, "not_found": 0, "failed": 0}
+
+    def lazy_load(self) -> Iterator[Document]:
+        started = time.perf_counter()
+        keys = [self._key(query) for query in self.queries]
+        entries = {
+            query: json.loads(value)
+            for query, value in zip(self.queries, self.store.mget(keys))
+            if value is not None
+        }
+        revisions = self._current_revisions([entry["title"] for entry in entries.values()])
+
+        stale = []
+        for query in self.queries:
+            entry = entries.get(query)
+            # Without a current revision (e.g. offline) the cached page is used as is
+            if entry is not None and (
+                revisions.get(entry["title"], entry["revision"]) == entry["revision"]
+            ):
+                self.stats["cached"] += 1
+                yield Document(page_content=entry["page_content"], metadata=entry["metadata"])
+            else:
+                stale.append(query)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._fetch, query): query for query in stale}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    document = future.result()
+                except Exception as e:
+                    # One failing page must not abort the others
+                    self.stats["failed"] += 1
+                    entry = entries.get(query)
+                    if entry is None:
+                        log.warning(f"Could not fetch the Wikipedia page for '{query}': {str(e)}")
+                        continue
+                    # Keep the outdated page rather than dropping it from the corpus
+                    self.stats["cached"] += 1
+                    log.warning(
+                        f"Could not fetch the Wikipedia page for '{query}', "
+                        f"using the cached revision: {str(e)}"
+                    )
+                    yield Document(page_content=entry["page_content"], metadata=entry["metadata"])
+                    continue
+                if document is None:
+                    self.stats["not_found"] += 1
+                    log.warning(f"No Wikipedia page found for '{query}'")
+                    continue
+                self.stats["fetched"] += 1
+                yield document
+
+        log.info(
+            f"Loaded {self.stats['cached'] + self.stats['fetched']} Wikipedia pages "
+            f"({self.stats['cached']} from the cache, {self.stats['fetched']} fetched, "
+            f"{self.stats['not_found']} not found, {self.stats['failed']} failed) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _key(self, query: str) -> str:
+        return f"{self.lang}:{self.doc_content_chars_max}:{query}"
+
+    def _fetch(self, query: str) -> Optional[Document]:
+        documents = WikipediaLoader(
+            query=query,
+            lang=self.lang,
+            load_max_docs=1,
+            doc_content_chars_max=self.doc_content_chars_max,
+        ).load()
+        if not documents:
+            return None
+
+        document = documents[0]
+        title = document.metadata["title"]
+        # Looked up after the page was loaded, so an edit in between only causes a refetch
+        revision = self._current_revisions([title]).get(title)
+        self.store.set(
+            self._key(query),
+            json.dumps(
+                {
+                    "title": title,
+                    "revision": revision,
+                    "page_content": document.page_content,
+                    "metadata": document.metadata,
+                }
+            ).encode("utf-8"),
+        )
+        return document
+
+    def _current_revisions(self, titles: list[str]) -> dict:
+        """
+        Returns the id of the latest revision per page title, empty if the lookup failed.
+        """
+        revisions = {}
+        try:
+            for start in range(0, len(titles), _TITLES_PER_REQUEST):
+                response = requests.get(
+                    f"https://{self.lang}.wikipedia.org/w/api.php",
+                    params={
+                        "action": "query",
+                        "prop": "info",
+                        "titles": "|".join(titles[start : start + _TITLES_PER_REQUEST]),
+                        "format": "json",
+                        "formatversion": 2,
+                    },
+                    timeout=20,
+                )
+                response.raise_for_status()
+                for page in response.json()["query"]["pages"]:
+                    if "lastrevid" in page:
+                        revisions[page["title"]] = page["lastrevid"]
+        except Exception as e:
+            log.warning(f"Could not look up the Wikipedia revisions: {str(e)}")
+        return revisions